@@ -1,5 +1,7 @@
 """Example usage of the recommendation system."""
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 from typing import List
@@ -7,30 +9,52 @@ from typing import List
 
 class RecommendationClient:
     """Client for interacting with the recommendation API."""
-    
+
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
-    
+        # One pooled session with keep-alive so repeated calls reuse a
+        # single TCP connection instead of reconnecting per request
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.1),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Connection": "keep-alive"})
+
+    def close(self):
+        """Close the underlying connection pool."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
     def record_click(self, session_id: str, item_id: str):
         """Record a click event."""
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/api/v1/click",
             json={"session_id": session_id, "item_id": item_id}
         )
         return response.json()
-    
+
     def get_recommendations(self, session_id: str):
         """Get recommendations for a session."""
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/api/v1/recommend",
             json={"session_id": session_id}
         )
         return response.json()
-    
-    def record_feedback(self, session_id: str, recommended_items: List[str], 
+
+    def record_feedback(self, session_id: str, recommended_items: List[str],
                        clicked_item: str = None):
         """Record feedback for recommendations."""
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/api/v1/feedback",
             json={
                 "session_id": session_id,
@@ -39,15 +63,28 @@ class RecommendationClient:
             }
         )
         return response.json()
-    
+
+    def step(self, session_id: str, clicked_item: str,
+             recommended_items: List[str] = None):
+        """Record a click plus feedback and get fresh recommendations."""
+        response = self._session.post(
+            f"{self.base_url}/api/v1/step",
+            json={
+                "session_id": session_id,
+                "clicked_item": clicked_item,
+                "recommended_items": recommended_items or []
+            }
+        )
+        return response.json()
+
     def get_metrics(self):
         """Get system metrics."""
-        response = requests.get(f"{self.base_url}/api/v1/metrics")
+        response = self._session.get(f"{self.base_url}/api/v1/metrics")
         return response.json()
-    
+
     def health_check(self):
         """Check system health."""
-        response = requests.get(f"{self.base_url}/api/v1/health")
+        response = self._session.get(f"{self.base_url}/api/v1/health")
         return response.json()
 
 
@@ -64,40 +101,27 @@ def simulate_user_session(client: RecommendationClient, session_id: str):
     print(f"  Used cold-start: {recs['used_coldstart']}")
     print(f"  Message: {recs['message']}\n")
     
-    # User clicks on first recommendation
+    # User clicks on first recommendation; /step records the click and
+    # feedback and returns the next recommendations in one round-trip
     first_item = recs['recommendations'][0]
-    print(f"Step 2: User clicks on {first_item}")
-    client.record_click(session_id, first_item)
-    client.record_feedback(session_id, recs['recommendations'], first_item)
-    print(f"  Click recorded\n")
-    
-    # Get recommendations after 1 click (still cold-start)
-    print("Step 3: Getting recommendations after 1 click (still cold-start)")
-    recs = client.get_recommendations(session_id)
+    print(f"Step 2: User clicks on {first_item} (still cold-start)")
+    recs = client.step(session_id, first_item, recs['recommendations'])
     print(f"  Recommendations: {recs['recommendations']}")
     print(f"  Used cold-start: {recs['used_coldstart']}\n")
-    
-    # User clicks on another item
+
+    # User clicks on another item; with 2 clicks the model takes over
     second_item = recs['recommendations'][1]
-    print(f"Step 4: User clicks on {second_item}")
-    client.record_click(session_id, second_item)
-    client.record_feedback(session_id, recs['recommendations'], second_item)
-    print(f"  Click recorded\n")
-    
-    # Get recommendations after 2 clicks (now using model)
-    print("Step 5: Getting recommendations after 2 clicks (using model)")
-    recs = client.get_recommendations(session_id)
+    print(f"Step 3: User clicks on {second_item} (now using model)")
+    recs = client.step(session_id, second_item, recs['recommendations'])
     print(f"  Recommendations: {recs['recommendations']}")
     print(f"  Used cold-start: {recs['used_coldstart']}")
     print(f"  Message: {recs['message']}\n")
-    
+
     # User continues clicking
     for i in range(3):
         item = recs['recommendations'][i % len(recs['recommendations'])]
-        print(f"Step {6+i}: User clicks on {item}")
-        client.record_click(session_id, item)
-        client.record_feedback(session_id, recs['recommendations'], item)
-        recs = client.get_recommendations(session_id)
+        print(f"Step {4+i}: User clicks on {item}")
+        recs = client.step(session_id, item, recs['recommendations'])
         print(f"  New recommendations: {recs['recommendations']}")
         print(f"  Used cold-start: {recs['used_coldstart']}\n")
         time.sleep(0.5)
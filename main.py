@@ -6,13 +6,21 @@ from src.config import get_settings
 def main():
     """Run the FastAPI application."""
     settings = get_settings()
-    
+
+    # uvloop and httptools replace the pure-Python event loop and HTTP
+    # parser (both ship with uvicorn[standard]), and multiple workers let
+    # the service use every core. Note: reload=True is incompatible with
+    # workers > 1, so development runs should use a single worker.
     uvicorn.run(
         "src.api.app:app",
         host=settings.api_host,
         port=settings.api_port,
         reload=False,
-        log_level="info"
+        workers=settings.api_workers,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        log_level="warning",
     )
 
 
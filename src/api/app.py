@@ -1,10 +1,15 @@
 """FastAPI application for session-based recommendations."""
 
+import asyncio
+
+import torch
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from contextlib import asynccontextmanager
 
+from src.batcher import RequestBatcher
 from src.config import get_settings
 from src.models import SASRec
 from src.storage import SessionStore, VectorStore
@@ -45,6 +50,17 @@ class FeedbackEvent(BaseModel):
     clicked_item: Optional[str] = Field(None, description="Item that was clicked")
 
 
+class StepEvent(BaseModel):
+    """Composite event: a click plus feedback, answered with fresh recommendations."""
+
+    session_id: str = Field(..., description="Session identifier")
+    clicked_item: str = Field(..., description="Item that was clicked")
+    recommended_items: List[str] = Field(
+        default_factory=list,
+        description="Items that were recommended before the click",
+    )
+
+
 class MetricsResponse(BaseModel):
     """Metrics response."""
 
@@ -98,6 +114,40 @@ async def lifespan(app: FastAPI):
         dropout=settings.dropout,
         max_seq_len=settings.sequence_length,
     )
+    model.eval()
+
+    # Optionally export the fp32 graph to ONNX Runtime before any
+    # quantization; ORT fuses and dispatches the graph in C++
+    onnx_predictor = None
+    if settings.use_onnx and not torch.cuda.is_available():
+        try:
+            from src.models.onnx_runner import OnnxPredictor
+
+            onnx_predictor = OnnxPredictor(model)
+        except ImportError:
+            print("⚠ onnxruntime not installed; using torch inference")
+
+    # On GPU, weights stay fp32 and the service wraps every forward in
+    # bf16 autocast: matmuls run on tensor cores while accumulations and
+    # softmax stay fp32, with no loss-scale concerns. On CPU, dynamically
+    # quantize the Linear layers to int8 (weights shrink 4x and the VNNI
+    # dot-product path kicks in on recent Intel hardware); the embedding
+    # table is left in fp32 because it is weight-tied to the output
+    # projection. At batch size 1 the GEMMs are too small for intra-op
+    # parallelism to help, so pin torch to one thread per worker.
+    if not torch.cuda.is_available():
+        torch.set_num_threads(1)
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        model.eval()
+
+    # Compile away Python dispatch overhead; fall back silently if the
+    # backend does not support this platform
+    try:
+        model = torch.compile(model, mode="reduce-overhead", fullgraph=False)
+    except Exception:
+        pass
 
     # Initialize storage
     session_store = SessionStore(
@@ -105,6 +155,7 @@ async def lifespan(app: FastAPI):
         port=settings.redis_port,
         db=settings.redis_db,
         expiry_seconds=settings.session_expiry_seconds,
+        unix_socket_path=settings.redis_unix_socket_path or None,
     )
 
     vector_store = VectorStore(
@@ -114,15 +165,32 @@ async def lifespan(app: FastAPI):
         embedding_dim=settings.embedding_dim,
     )
 
+    # Index the item embeddings once so large catalogs can be scored via
+    # ANN search instead of the dense output projection (row 0 is padding)
+    vector_store.add_items(
+        item_catalog.get_all_item_ids(),
+        model.item_embedding.weight[1:].detach().float().cpu().numpy(),
+    )
+
     # Initialize cold-start handler
     bandit = ThompsonSamplingBandit(item_ids=item_catalog.get_all_item_ids())
     coldstart_handler = ColdStartHandler(
         bandit=bandit, threshold=settings.cold_start_threshold
     )
 
+    # Keep the trending list fresh off the request path
+    trending_task = asyncio.create_task(
+        coldstart_handler.refresh_loop(k=settings.top_k)
+    )
+
     # Initialize metrics
     metrics_tracker = MetricsTracker(window_size=1000)
 
+    # Batch concurrent forward passes into a single model call
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    batcher = RequestBatcher(model=model, device=device)
+    batcher.start()
+
     # Create recommendation service
     recommendation_service = RecommendationService(
         model=model,
@@ -133,6 +201,8 @@ async def lifespan(app: FastAPI):
         item_catalog=item_catalog,
         sequence_length=settings.sequence_length,
         top_k=settings.top_k,
+        batcher=batcher,
+        onnx_predictor=onnx_predictor,
     )
 
     print("✓ Recommendation service initialized successfully")
@@ -140,6 +210,8 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown (cleanup if needed)
+    trending_task.cancel()
+    await batcher.stop()
     print("✓ Recommendation service shutdown")
 
 
@@ -149,6 +221,9 @@ app = FastAPI(
     description="Real-time recommendation system for anonymous users",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson serializes responses in Rust instead of walking the structure
+    # in pure Python
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -164,7 +239,7 @@ async def record_click(
     Sessions automatically expire after 30 minutes for privacy.
     """
     try:
-        service.add_click_event(event.session_id, event.item_id)
+        await service.add_click_event_async(event.session_id, event.item_id)
         return {
             "status": "success",
             "message": f"Click event recorded for session {event.session_id}",
@@ -186,7 +261,7 @@ async def get_recommendations(
     Multi-Armed Bandit algorithm.
     """
     try:
-        recommendations, used_coldstart = service.get_recommendations(
+        recommendations, used_coldstart = await service.get_recommendations_async(
             request.session_id
         )
 
@@ -221,6 +296,40 @@ async def record_feedback(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/v1/step", response_model=RecommendationResponse)
+async def record_step(
+    event: StepEvent,
+    service: RecommendationService = Depends(get_recommendation_service),
+):
+    """
+    Record a click plus feedback and return fresh recommendations.
+
+    Combines /click, /feedback, and /recommend into one round-trip so
+    clients pay a single request per interaction step.
+    """
+    try:
+        await service.add_click_event_async(event.session_id, event.clicked_item)
+        if event.recommended_items:
+            service.record_feedback(
+                event.session_id, event.recommended_items, event.clicked_item
+            )
+
+        recommendations, used_coldstart = await service.get_recommendations_async(
+            event.session_id
+        )
+
+        strategy = "cold-start (trending items)" if used_coldstart else "model-based"
+
+        return RecommendationResponse(
+            session_id=event.session_id,
+            recommendations=recommendations,
+            used_coldstart=used_coldstart,
+            message=f"Recommendations generated using {strategy} strategy",
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/v1/metrics", response_model=MetricsResponse)
 async def get_metrics(
     service: RecommendationService = Depends(get_recommendation_service),
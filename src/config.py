@@ -1,11 +1,14 @@
 """Configuration management for the session-based recommendation system."""
 
+import os
+
+from dataclasses import dataclass
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
 
 class Settings(BaseSettings):
-    """Application settings."""
+    """Application settings, parsed and validated from the environment."""
 
     model_config = {
         "env_file": ".env",
@@ -17,6 +20,8 @@ class Settings(BaseSettings):
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
+    # Set for colocated Redis to bypass the TCP stack
+    redis_unix_socket_path: str = ""
     session_expiry_seconds: int = 1800  # 30 minutes
 
     # Qdrant Configuration
@@ -36,12 +41,58 @@ class Settings(BaseSettings):
     top_k: int = 5
     cold_start_threshold: int = 2
 
+    # Serve full forward passes through ONNX Runtime (requires the
+    # optional onnxruntime dependency)
+    use_onnx: bool = False
+
     # Server Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    api_workers: int = os.cpu_count() or 2
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenSettings:
+    """
+    Immutable snapshot of Settings.
+
+    Pydantic only needs to validate the environment once; after that,
+    attribute reads on a slots dataclass are direct slot loads with none
+    of the model machinery in the way.
+    """
+
+    # Redis Configuration
+    redis_host: str
+    redis_port: int
+    redis_db: int
+    redis_unix_socket_path: str
+    session_expiry_seconds: int
+
+    # Qdrant Configuration
+    qdrant_host: str
+    qdrant_port: int
+    qdrant_collection_name: str
+
+    # Model Configuration
+    model_name: str
+    sequence_length: int
+    embedding_dim: int
+    num_heads: int
+    num_layers: int
+    dropout: float
+
+    # Recommendation Configuration
+    top_k: int
+    cold_start_threshold: int
+    use_onnx: bool
+
+    # Server Configuration
+    api_host: str
+    api_port: int
+    api_workers: int
 
 
 @lru_cache()
-def get_settings() -> Settings:
+def get_settings() -> FrozenSettings:
     """Get cached settings instance."""
-    return Settings()
+    return FrozenSettings(**Settings().model_dump())
@@ -2,7 +2,138 @@
 
 import torch
 import torch.nn as nn
-from typing import Tuple
+import torch.nn.functional as F
+from typing import List, Optional, Tuple
+
+# Per-layer key/value cache: one (key, value) pair per transformer block,
+# each of shape (batch_size, num_heads, seq_len_so_far, head_dim)
+KVCache = List[Tuple[torch.Tensor, torch.Tensor]]
+
+
+class TransformerBlock(nn.Module):
+    """
+    Post-norm transformer encoder block that exposes its key/value tensors.
+
+    Functionally equivalent to nn.TransformerEncoderLayer(activation="gelu",
+    batch_first=True), but the attention is hand-rolled so incremental
+    decoding can reuse cached keys/values instead of recomputing them for
+    every position on every request.
+    """
+
+    def __init__(self, embedding_dim: int, num_heads: int, dropout: float):
+        super().__init__()
+        if embedding_dim % num_heads != 0:
+            raise ValueError("embedding_dim must be divisible by num_heads")
+
+        self.num_heads = num_heads
+        self.head_dim = embedding_dim // num_heads
+
+        self.q_proj = nn.Linear(embedding_dim, embedding_dim)
+        self.k_proj = nn.Linear(embedding_dim, embedding_dim)
+        self.v_proj = nn.Linear(embedding_dim, embedding_dim)
+        self.out_proj = nn.Linear(embedding_dim, embedding_dim)
+
+        self.linear1 = nn.Linear(embedding_dim, embedding_dim * 4)
+        self.linear2 = nn.Linear(embedding_dim * 4, embedding_dim)
+
+        self.norm1 = nn.LayerNorm(embedding_dim)
+        self.norm2 = nn.LayerNorm(embedding_dim)
+        self.dropout = nn.Dropout(dropout)
+
+    def _split_heads(self, x: torch.Tensor) -> torch.Tensor:
+        """Reshape (batch, seq, dim) to (batch, heads, seq, head_dim)."""
+        batch_size, seq_len, _ = x.shape
+        return x.view(batch_size, seq_len, self.num_heads, self.head_dim).transpose(
+            1, 2
+        )
+
+    def _attention(
+        self,
+        query: torch.Tensor,
+        key: torch.Tensor,
+        value: torch.Tensor,
+        attn_mask: Optional[torch.Tensor] = None,
+        key_padding_mask: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        """Scaled dot-product attention over pre-split head tensors.
+
+        Dispatches to F.scaled_dot_product_attention, which fuses the
+        matmul/mask/softmax/matmul chain into one kernel (FlashAttention
+        on supported GPUs) instead of materialising the full attention
+        matrix in memory.
+        """
+        if key_padding_mask is not None:
+            pad = torch.zeros(
+                key_padding_mask.shape, dtype=query.dtype, device=query.device
+            ).masked_fill_(key_padding_mask, float("-inf"))[:, None, None, :]
+            attn_mask = pad if attn_mask is None else attn_mask + pad
+
+        out = F.scaled_dot_product_attention(
+            query,
+            key,
+            value,
+            attn_mask=attn_mask,
+            dropout_p=self.dropout.p if self.training else 0.0,
+        )
+        if key_padding_mask is not None:
+            # Fully-masked query rows (left-padded positions) come out as
+            # NaN; zero them so they cannot contaminate real positions
+            out = torch.nan_to_num(out)
+
+        batch_size, _, seq_len, _ = out.shape
+        out = out.transpose(1, 2).reshape(batch_size, seq_len, -1)
+        return self.out_proj(out)
+
+    def _feed_forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.linear2(self.dropout(F.gelu(self.linear1(x))))
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        attn_mask: Optional[torch.Tensor] = None,
+        key_padding_mask: Optional[torch.Tensor] = None,
+    ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, torch.Tensor]]:
+        """
+        Full self-attention pass over the whole sequence.
+
+        Returns:
+            Tuple of (block output, (key, value)) where key/value can be
+            cached for subsequent incremental steps.
+        """
+        query = self._split_heads(self.q_proj(x))
+        key = self._split_heads(self.k_proj(x))
+        value = self._split_heads(self.v_proj(x))
+
+        attn_out = self._attention(query, key, value, attn_mask, key_padding_mask)
+        x = self.norm1(x + self.dropout(attn_out))
+        x = self.norm2(x + self.dropout(self._feed_forward(x)))
+        return x, (key, value)
+
+    def forward_incremental(
+        self, x: torch.Tensor, past_kv: Tuple[torch.Tensor, torch.Tensor]
+    ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, torch.Tensor]]:
+        """
+        Attention for a single new position reusing cached keys/values.
+
+        Args:
+            x: Block input for the new position, shape (batch, 1, dim)
+            past_kv: Cached (key, value) for all previous positions
+
+        Returns:
+            Tuple of (block output for the new position, extended cache)
+        """
+        past_key, past_value = past_kv
+
+        query = self._split_heads(self.q_proj(x))
+        key = torch.cat([past_key, self._split_heads(self.k_proj(x))], dim=2)
+        value = torch.cat([past_value, self._split_heads(self.v_proj(x))], dim=2)
+
+        # The single query is the last position, so attending to every
+        # cached key already respects causality -- no mask needed.
+        attn_out = self._attention(query, key, value)
+        x = self.norm1(x + self.dropout(attn_out))
+        x = self.norm2(x + self.dropout(self._feed_forward(x)))
+        return x, (key, value)
 
 
 class SASRec(nn.Module):
@@ -40,21 +171,19 @@ class SASRec(nn.Module):
         # Positional embeddings
         self.positional_embedding = nn.Embedding(max_seq_len, embedding_dim)
 
-        # Transformer encoder layers
-        encoder_layer = nn.TransformerEncoderLayer(
-            d_model=embedding_dim,
-            nhead=num_heads,
-            dim_feedforward=embedding_dim * 4,
-            dropout=dropout,
-            activation="gelu",
-            batch_first=True,
-        )
-        self.transformer_encoder = nn.TransformerEncoder(
-            encoder_layer, num_layers=num_layers
+        # Transformer encoder blocks (hand-rolled so each layer exposes its
+        # key/value tensors for incremental inference)
+        self.blocks = nn.ModuleList(
+            [
+                TransformerBlock(embedding_dim, num_heads, dropout)
+                for _ in range(num_layers)
+            ]
         )
 
-        # Output layer
-        self.output_layer = nn.Linear(embedding_dim, num_items)
+        # Output projection is tied to the item embedding (scores are
+        # last_hidden @ item_embedding.weight[1:].T); the eval path caches
+        # the transposed weight here
+        self._cached_emb_t: Optional[torch.Tensor] = None
 
         # Layer normalization
         self.layer_norm = nn.LayerNorm(embedding_dim)
@@ -62,44 +191,58 @@ class SASRec(nn.Module):
         # Dropout
         self.dropout = nn.Dropout(dropout)
 
-    def forward(self, item_seq: torch.Tensor) -> torch.Tensor:
+        # Causal mask is fixed for a given max_seq_len; build it once and
+        # register it as a buffer so it follows the model across devices
+        causal_mask = torch.triu(
+            torch.full((max_seq_len, max_seq_len), float("-inf")), diagonal=1
+        )
+        self.register_buffer("_causal_mask", causal_mask, persistent=False)
+
+        # Position indices are likewise fixed; slice instead of re-arange
+        self.register_buffer(
+            "_positions", torch.arange(max_seq_len).unsqueeze(0), persistent=False
+        )
+
+    def _embed(self, item_seq: torch.Tensor, start_pos: int = 0) -> torch.Tensor:
+        """Combine item and positional embeddings for a (sub)sequence."""
+        batch_size, seq_len = item_seq.shape
+        positions = self._positions[:, start_pos : start_pos + seq_len].expand(
+            batch_size, -1
+        )
+        x = self.item_embedding(item_seq) + self.positional_embedding(positions)
+        x = self.layer_norm(x)
+        return self.dropout(x)
+
+    def _trunk(
+        self, item_seq: torch.Tensor, use_cache: bool = False
+    ) -> Tuple[torch.Tensor, KVCache]:
         """
-        Forward pass through the model.
+        Run the transformer trunk and gather the last valid hidden state.
 
         Args:
             item_seq: Tensor of shape (batch_size, seq_len) containing item indices
+            use_cache: If True, collect the per-layer key/value cache
 
         Returns:
-            Logits tensor of shape (batch_size, num_items)
+            Tuple of (hidden states of shape (batch_size, embedding_dim),
+            KV cache -- empty unless use_cache is True)
         """
         batch_size, seq_len = item_seq.shape
 
         # Create padding mask (True for padding positions)
         padding_mask = item_seq == 0
 
-        # Get item embeddings
-        item_emb = self.item_embedding(item_seq)  # (batch_size, seq_len, embedding_dim)
-
-        # Get positional embeddings
-        positions = (
-            torch.arange(seq_len, device=item_seq.device)
-            .unsqueeze(0)
-            .expand(batch_size, -1)
-        )
-        pos_emb = self.positional_embedding(positions)
-
-        # Combine embeddings
-        x = item_emb + pos_emb
-        x = self.layer_norm(x)
-        x = self.dropout(x)
+        x = self._embed(item_seq)
 
-        # Create causal mask (prevent attending to future positions)
-        causal_mask = self._generate_causal_mask(seq_len, item_seq.device)
+        # Slice the precomputed causal mask (prevents attending to future
+        # positions) instead of rebuilding it every call
+        causal_mask = self._causal_mask[:seq_len, :seq_len]
 
-        # Pass through transformer with both padding and causal masks
-        x = self.transformer_encoder(
-            x, mask=causal_mask, src_key_padding_mask=padding_mask
-        )
+        past_kv: KVCache = []
+        for block in self.blocks:
+            x, kv = block(x, attn_mask=causal_mask, key_padding_mask=padding_mask)
+            if use_cache:
+                past_kv.append(kv)
 
         # Use the last non-padding position for each sequence
         # Get the last non-zero position for each sequence
@@ -108,12 +251,109 @@ class SASRec(nn.Module):
 
         # Gather the output at the last valid position
         last_items = x[torch.arange(batch_size), seq_lengths]
+        return last_items, past_kv
 
-        # Project to item space
-        logits = self.output_layer(last_items)
+    def forward(self, item_seq: torch.Tensor, use_cache: bool = False) -> torch.Tensor:
+        """
+        Forward pass through the model.
+
+        Args:
+            item_seq: Tensor of shape (batch_size, seq_len) containing item indices
+            use_cache: If True, also return the per-layer key/value cache for
+                use with forward_incremental
+
+        Returns:
+            Logits tensor of shape (batch_size, num_items), or a tuple of
+            (logits, kv_cache) when use_cache is True
+        """
+        last_items, past_kv = self._trunk(item_seq, use_cache=use_cache)
+
+        # Project to item space via the tied embedding weight
+        logits = self._project_to_items(last_items)
 
+        if use_cache:
+            return logits, past_kv
         return logits
 
+    def encode_session(self, item_seq: torch.Tensor) -> torch.Tensor:
+        """
+        Encode a session into its embedding (the pre-projection vector).
+
+        Because the output projection is tied to the item embedding, the
+        nearest item embeddings to this vector are exactly the top-scoring
+        items, so it can be handed to an ANN index instead of running the
+        dense projection over the whole catalog.
+
+        Args:
+            item_seq: Tensor of shape (batch_size, seq_len) containing item indices
+
+        Returns:
+            Session embeddings of shape (batch_size, embedding_dim)
+        """
+        hidden, _ = self._trunk(item_seq)
+        return hidden
+
+    def forward_incremental(
+        self, new_item_id: torch.Tensor, past_kv: KVCache
+    ) -> Tuple[torch.Tensor, KVCache]:
+        """
+        Incremental forward pass for a single newly appended item.
+
+        Only the new position is embedded and pushed through each block;
+        keys/values of earlier positions come from the cache, cutting
+        per-request attention work from O(seq_len^2) to O(seq_len).
+
+        Args:
+            new_item_id: Tensor of shape (batch_size, 1) with the new item index
+            past_kv: Per-layer key/value cache from a previous forward
+                (use_cache=True) or forward_incremental call
+
+        Returns:
+            Tuple of (logits of shape (batch_size, num_items), extended cache)
+        """
+        past_len = past_kv[0][0].shape[2]
+        if past_len >= self.max_seq_len:
+            raise ValueError(
+                f"KV cache already holds {past_len} positions; "
+                f"max_seq_len is {self.max_seq_len}"
+            )
+
+        x = self._embed(new_item_id, start_pos=past_len)
+
+        new_past_kv: KVCache = []
+        for block, layer_kv in zip(self.blocks, past_kv):
+            x, kv = block.forward_incremental(x, layer_kv)
+            new_past_kv.append(kv)
+
+        logits = self._project_to_items(x[:, -1])
+        return logits, new_past_kv
+
+    def _project_to_items(self, hidden: torch.Tensor) -> torch.Tensor:
+        """
+        Score all items by the tied item-embedding weight.
+
+        Row 0 of the embedding is padding, so logits column i corresponds
+        to item index i + 1. In eval mode the transposed weight is cached
+        contiguously once and reused.
+
+        Args:
+            hidden: Hidden states of shape (batch_size, embedding_dim)
+
+        Returns:
+            Logits tensor of shape (batch_size, num_items)
+        """
+        if self.training:
+            return hidden @ self.item_embedding.weight[1:].T
+
+        if self._cached_emb_t is None:
+            self._cached_emb_t = self.item_embedding.weight[1:].detach().T.contiguous()
+        return hidden @ self._cached_emb_t
+
+    def train(self, mode: bool = True) -> "SASRec":
+        """Switch train/eval mode, invalidating the tied-weight cache."""
+        self._cached_emb_t = None
+        return super().train(mode)
+
     def predict_next_items(
         self, item_seq: torch.Tensor, top_k: int = 5
     ) -> Tuple[torch.Tensor, torch.Tensor]:
@@ -130,27 +370,12 @@ class SASRec(nn.Module):
             - top_scores: Tensor of shape (batch_size, top_k) with scores
         """
         self.eval()
-        with torch.no_grad():
+        with torch.inference_mode():
             logits = self.forward(item_seq)
-            scores = torch.softmax(logits, dim=-1)
 
-            # Get top-k items and scores
-            top_scores, top_items = torch.topk(scores, k=top_k, dim=-1)
+            # softmax is monotonic, so topk over raw logits gives the same
+            # items; normalize only the k scores we actually return
+            top_scores, top_items = torch.topk(logits, k=top_k, dim=-1)
+            top_scores = torch.softmax(top_scores, dim=-1)
 
         return top_items, top_scores
-
-    def _generate_causal_mask(self, seq_len: int, device: torch.device) -> torch.Tensor:
-        """
-        Generate causal mask to prevent attending to future positions.
-
-        Args:
-            seq_len: Sequence length
-            device: Device to create mask on
-
-        Returns:
-            Causal mask tensor of shape (seq_len, seq_len)
-        """
-        mask = torch.triu(
-            torch.full((seq_len, seq_len), float("-inf"), device=device), diagonal=1
-        )
-        return mask
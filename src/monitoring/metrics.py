@@ -1,35 +1,107 @@
 """Metrics tracking for observability."""
 
+import threading
 import time
 import numpy as np
-from typing import List, Dict
-from collections import deque
+from typing import List, Dict, Optional, Tuple
 from threading import Lock
 
 
+class _MetricsShard:
+    """Per-thread metrics state, written lock-free by its owner thread."""
+
+    __slots__ = (
+        "hit_buf",
+        "hit_head",
+        "hit_count",
+        "lat_buf",
+        "lat_head",
+        "lat_count",
+        "hist",
+        "hist_total",
+        "total_requests",
+        "coldstart_requests",
+        "model_requests",
+    )
+
+    def __init__(self, window_size: int):
+        # Hit Rate window as a preallocated int8 ring buffer: appends
+        # are a single array store with no per-event object allocation,
+        # and the hit count is one SIMD sum over a contiguous view
+        self.hit_buf = np.zeros(window_size, dtype=np.int8)
+        self.hit_head = 0
+        self.hit_count = 0
+
+        # Latency window (milliseconds) as a preallocated ring buffer:
+        # recording is an array store + index bump, and readers get a
+        # contiguous float64 view for vectorized reductions
+        self.lat_buf = np.empty(window_size, dtype=np.float64)
+        self.lat_head = 0
+        self.lat_count = 0
+
+        # Fixed-width latency histogram: 1 ms buckets up to 1 s plus an
+        # overflow bucket. Percentiles become a cumulative walk over the
+        # buckets, independent of window size, and eviction from the
+        # latency window decrements the matching bucket so the histogram
+        # tracks exactly the sliding window.
+        self.hist = np.zeros(1001, dtype=np.int64)
+        self.hist_total = 0
+
+        # Request tracking
+        self.total_requests = 0
+        self.coldstart_requests = 0
+        self.model_requests = 0
+
+    def clear(self):
+        self.hit_buf[:] = 0
+        self.hit_head = 0
+        self.hit_count = 0
+        self.lat_head = 0
+        self.lat_count = 0
+        self.hist[:] = 0
+        self.hist_total = 0
+        self.total_requests = 0
+        self.coldstart_requests = 0
+        self.model_requests = 0
+
+
 class MetricsTracker:
-    """Real-time metrics tracker for recommendation system."""
+    """
+    Real-time metrics tracker for recommendation system.
+
+    Recording is sharded per thread: each worker thread writes to its own
+    counters and windows without taking a lock, and readers aggregate the
+    shards on demand. The lock is only held to register a new thread's
+    shard and during reset.
+    """
 
     def __init__(self, window_size: int = 1000):
         """
         Initialize metrics tracker.
 
         Args:
-            window_size: Size of sliding window for metrics
+            window_size: Size of sliding window for metrics (per thread)
         """
         self.window_size = window_size
         self.lock = Lock()
 
-        # Hit Rate tracking
-        self.hit_events = deque(maxlen=window_size)
+        self._tls = threading.local()
+        self._shards: List[_MetricsShard] = []
 
-        # Latency tracking (in milliseconds)
-        self.latencies = deque(maxlen=window_size)
+        # Short-TTL summary cache so high-frequency scrapes share one
+        # aggregation pass instead of re-merging the shards each time
+        self._summary_cache: Optional[Dict] = None
+        self._summary_cache_ts = 0.0
 
-        # Request tracking
-        self.total_requests = 0
-        self.coldstart_requests = 0
-        self.model_requests = 0
+    def _shard(self) -> _MetricsShard:
+        """Get (lazily creating) the calling thread's shard."""
+        shard = getattr(self._tls, "shard", None)
+        if shard is None:
+            shard = _MetricsShard(self.window_size)
+            self._tls.shard = shard
+            with self.lock:
+                self._shards.append(shard)
+        return shard
 
     def record_recommendation(
         self,
@@ -47,45 +119,120 @@ class MetricsTracker:
             latency_ms: Latency in milliseconds
             used_coldstart: Whether cold-start logic was used
         """
-        with self.lock:
-            # Record hit rate
-            hit = 1 if item_clicked and item_clicked in items_recommended else 0
-            self.hit_events.append(hit)
-
-            # Record latency
-            if latency_ms is not None:
-                self.latencies.append(latency_ms)
-
-            # Update counters
-            self.total_requests += 1
-            if used_coldstart:
-                self.coldstart_requests += 1
+        # The shard belongs to this thread, so no lock is needed
+        shard = self._shard()
+
+        # Record hit rate
+        hit = 1 if item_clicked and item_clicked in items_recommended else 0
+        shard.hit_buf[shard.hit_head] = hit
+        shard.hit_head = (shard.hit_head + 1) % self.window_size
+        shard.hit_count = min(shard.hit_count + 1, self.window_size)
+
+        # Record latency
+        if latency_ms is not None:
+            if shard.lat_count == self.window_size:
+                # The write position holds the sample being evicted
+                shard.hist[self._bucket(shard.lat_buf[shard.lat_head])] -= 1
+                shard.hist_total -= 1
             else:
-                self.model_requests += 1
+                shard.lat_count += 1
+            shard.lat_buf[shard.lat_head] = latency_ms
+            shard.lat_head = (shard.lat_head + 1) % self.window_size
+            shard.hist[self._bucket(latency_ms)] += 1
+            shard.hist_total += 1
+
+        # Update counters
+        shard.total_requests += 1
+        if used_coldstart:
+            shard.coldstart_requests += 1
+        else:
+            shard.model_requests += 1
+
+    @staticmethod
+    def _bucket(latency_ms: float) -> int:
+        """Map a latency to its histogram bucket (last bucket is overflow)."""
+        return min(int(latency_ms), 1000)
+
+    def _merged_hist(self) -> Tuple[np.ndarray, int]:
+        """Merge the shard histograms into one (cumulative sums, total)."""
+        total = sum(shard.hist_total for shard in self._shards)
+        hist = np.zeros(1001, dtype=np.int64)
+        for shard in self._shards:
+            hist += shard.hist
+        return np.cumsum(hist), total
+
+    def _hist_percentile(self, quantile: float) -> float:
+        """Read a percentile from the merged shard histograms."""
+        cumulative, total = self._merged_hist()
+        if total == 0:
+            return 0.0
+        return float(np.searchsorted(cumulative, quantile * total))
+
+    @property
+    def total_requests(self) -> int:
+        return sum(shard.total_requests for shard in self._shards)
+
+    @property
+    def coldstart_requests(self) -> int:
+        return sum(shard.coldstart_requests for shard in self._shards)
+
+    @property
+    def model_requests(self) -> int:
+        return sum(shard.model_requests for shard in self._shards)
 
     def _calculate_hit_rate(self) -> float:
-        """Calculate hit rate without lock (internal use only)."""
-        if not self.hit_events:
+        """Calculate hit rate across shards (internal use only)."""
+        hits = sum(
+            int(shard.hit_buf[: shard.hit_count].sum()) for shard in self._shards
+        )
+        count = sum(shard.hit_count for shard in self._shards)
+        if count == 0:
             return 0.0
-        return (sum(self.hit_events) / len(self.hit_events)) * 100
+        return (hits / count) * 100
 
     def _calculate_p99_latency(self) -> float:
-        """Calculate P99 latency without lock (internal use only)."""
-        if not self.latencies:
-            return 0.0
-        return float(np.percentile(list(self.latencies), 99))
+        """Calculate P99 latency across shards (internal use only)."""
+        return self._hist_percentile(0.99)
 
     def _calculate_average_latency(self) -> float:
-        """Calculate average latency without lock (internal use only)."""
-        if not self.latencies:
+        """Calculate average latency across shards (internal use only)."""
+        total = sum(
+            float(np.sum(shard.lat_buf[: shard.lat_count])) for shard in self._shards
+        )
+        count = sum(shard.lat_count for shard in self._shards)
+        if count == 0:
             return 0.0
-        return float(np.mean(list(self.latencies)))
+        return total / count
 
     def _calculate_p50_latency(self) -> float:
-        """Calculate P50 latency without lock (internal use only)."""
-        if not self.latencies:
-            return 0.0
-        return float(np.percentile(list(self.latencies), 50))
+        """Calculate P50 latency across shards (internal use only)."""
+        return self._hist_percentile(0.5)
+
+    def get_exact_percentile(self, quantile: float) -> float:
+        """
+        Exact order-statistic percentile over the merged latency windows.
+
+        Unlike the 1 ms histogram this is not quantised: np.partition
+        selects the k-th sample directly without sorting the whole
+        window. Intended for callers that need sub-ms resolution.
+
+        Args:
+            quantile: Quantile in [0, 1]
+
+        Returns:
+            Latency in milliseconds at the given quantile
+        """
+        with self.lock:
+            windows = [
+                shard.lat_buf[: shard.lat_count]
+                for shard in self._shards
+                if shard.lat_count
+            ]
+            if not windows:
+                return 0.0
+            merged = np.concatenate(windows)
+            k = int(quantile * (len(merged) - 1))
+            return float(np.partition(merged, k)[k])
 
     def get_hit_rate(self, k: int = 10) -> float:
         """
@@ -137,48 +284,60 @@ class MetricsTracker:
         Returns:
             Dictionary with all metrics
         """
+        now = time.monotonic()
+        cached = self._summary_cache
+        if cached is not None and now - self._summary_cache_ts < 0.1:
+            return cached
+
         with self.lock:
-            return {
+            total = self.total_requests
+            coldstart = self.coldstart_requests
+            # One histogram merge serves both percentiles
+            cumulative, hist_total = self._merged_hist()
+            if hist_total:
+                p50 = float(np.searchsorted(cumulative, 0.5 * hist_total))
+                p99 = float(np.searchsorted(cumulative, 0.99 * hist_total))
+            else:
+                p50 = p99 = 0.0
+            summary = {
                 "hit_rate_at_10": round(self._calculate_hit_rate(), 2),
-                "p99_latency_ms": round(self._calculate_p99_latency(), 2),
-                "p50_latency_ms": round(self._calculate_p50_latency(), 2),
+                "p99_latency_ms": round(p99, 2),
+                "p50_latency_ms": round(p50, 2),
                 "avg_latency_ms": round(self._calculate_average_latency(), 2),
-                "total_requests": self.total_requests,
-                "coldstart_requests": self.coldstart_requests,
+                "total_requests": total,
+                "coldstart_requests": coldstart,
                 "model_requests": self.model_requests,
                 "coldstart_percentage": round(
-                    (
-                        (self.coldstart_requests / self.total_requests * 100)
-                        if self.total_requests > 0
-                        else 0.0
-                    ),
+                    (coldstart / total * 100) if total > 0 else 0.0,
                     2,
                 ),
             }
 
+        self._summary_cache = summary
+        self._summary_cache_ts = now
+        return summary
+
     def reset(self):
         """Reset all metrics."""
         with self.lock:
-            self.hit_events.clear()
-            self.latencies.clear()
-            self.total_requests = 0
-            self.coldstart_requests = 0
-            self.model_requests = 0
+            for shard in self._shards:
+                shard.clear()
+            self._summary_cache = None
 
 
 class LatencyTimer:
     """Context manager for measuring latency."""
 
     def __init__(self):
-        self.start_time = None
-        self.end_time = None
+        self._start_ns = None
         self.latency_ms = None
 
     def __enter__(self):
-        self.start_time = time.time()
+        # perf_counter_ns is monotonic and ns-resolution; time.time() is
+        # subject to NTP adjustments that corrupt sub-ms measurements
+        self._start_ns = time.perf_counter_ns()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end_time = time.time()
-        self.latency_ms = (self.end_time - self.start_time) * 1000  # Convert to ms
+        self.latency_ms = (time.perf_counter_ns() - self._start_ns) * 1e-6
         return False
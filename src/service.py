@@ -1,17 +1,31 @@
 """Recommendation service that orchestrates all components."""
 
+import contextlib
+
+import numpy as np
 import torch
-from typing import List, Optional, Tuple
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from src.batcher import RequestBatcher
 from src.models import SASRec
+from src.models.sasrec import KVCache
 from src.storage import SessionStore, VectorStore
 from src.coldstart import ColdStartHandler
-from src.monitoring import MetricsTracker, LatencyTimer
+from src.monitoring import MetricsTracker
+from time import perf_counter_ns
 from src.utils import ItemCatalog
 
+if TYPE_CHECKING:
+    from src.models.onnx_runner import OnnxPredictor
+
 
 class RecommendationService:
     """Main recommendation service."""
 
+    # Catalogs at least this large are scored through the ANN index
+    # instead of the dense tied-weight projection
+    ANN_MIN_CATALOG = 1024
+
     def __init__(
         self,
         model: SASRec,
@@ -22,6 +36,8 @@ class RecommendationService:
         item_catalog: ItemCatalog,
         sequence_length: int = 5,
         top_k: int = 5,
+        batcher: Optional[RequestBatcher] = None,
+        onnx_predictor: Optional["OnnxPredictor"] = None,
     ):
         """
         Initialize recommendation service.
@@ -35,6 +51,10 @@ class RecommendationService:
             item_catalog: Item catalog
             sequence_length: Maximum sequence length
             top_k: Number of recommendations to return
+            batcher: Optional request batcher for coalescing concurrent
+                model forward passes
+            onnx_predictor: Optional ONNX Runtime predictor; when set,
+                full forward passes run through ORT instead of eager torch
         """
         self.model = model
         self.session_store = session_store
@@ -44,10 +64,68 @@ class RecommendationService:
         self.item_catalog = item_catalog
         self.sequence_length = sequence_length
         self.top_k = top_k
+        self.batcher = batcher
+        self.onnx_predictor = onnx_predictor
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model.to(self.device)
         self.model.eval()
 
+        # Per-session key/value cache so a session that grew by one click
+        # only pushes the new item through the transformer. Maps session_id
+        # to (item index tuple the cache was built from, per-layer KV cache).
+        self._kv_cache: "OrderedDict[str, Tuple[Tuple[int, ...], KVCache]]" = (
+            OrderedDict()
+        )
+        self._kv_cache_max_sessions = 1024
+
+        # For large catalogs, replace the O(N*d) output projection with an
+        # O(log N) HNSW lookup against the item embeddings in Qdrant
+        self._use_ann = item_catalog.get_num_items() >= self.ANN_MIN_CATALOG
+
+        # Reusable input staging buffer: pinned on CUDA hosts so the
+        # host-to-device copy can overlap, plain CPU memory otherwise.
+        # Requests write their indices in place instead of allocating a
+        # fresh tensor per call.
+        pin = self.device.type == "cuda"
+        self._seq_buf_cpu = torch.zeros(
+            (1, sequence_length), dtype=torch.long, pin_memory=pin
+        )
+        self._seq_buf_dev = (
+            self._seq_buf_cpu.to(self.device) if pin else self._seq_buf_cpu
+        )
+
+        self._warmup()
+
+    def _autocast(self):
+        """
+        Mixed-precision context for model forwards.
+
+        bf16 autocast on CUDA runs the matmuls on tensor cores while
+        keeping accumulations in fp32; a no-op context elsewhere (the
+        CPU path is already int8-quantized).
+        """
+        if self.device.type == "cuda":
+            return torch.autocast(device_type="cuda", dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    def _warmup(self) -> None:
+        """
+        Prime the inference path before serving traffic.
+
+        Runs a dummy forward at every sequence length so lazy one-time
+        costs -- torch.compile shape specialisations, the cached output
+        projection, allocator pools -- are paid at startup rather than
+        by the first requests. CUDA graph capture was considered here,
+        but inputs are variable-length and reuse per-session KV caches,
+        so there is no single static shape to capture.
+        """
+        with torch.inference_mode(), self._autocast():
+            for n in range(1, self.sequence_length + 1):
+                seq = torch.ones((1, n), dtype=torch.long, device=self.device)
+                self.model.forward(seq, use_cache=True)
+        if self.device.type == "cuda":
+            torch.cuda.synchronize()
+
     def add_click_event(self, session_id: str, item_id: str) -> None:
         """
         Add a click event to a session.
@@ -58,6 +136,16 @@ class RecommendationService:
         """
         self.session_store.add_click(session_id, item_id)
 
+    async def add_click_event_async(self, session_id: str, item_id: str) -> None:
+        """
+        Add a click event to a session without blocking the event loop.
+
+        Args:
+            session_id: Session identifier
+            item_id: Item that was clicked
+        """
+        await self.session_store.add_click_async(session_id, item_id)
+
     def get_recommendations(self, session_id: str) -> Tuple[List[str], bool]:
         """
         Get recommendations for a session.
@@ -68,91 +156,345 @@ class RecommendationService:
         Returns:
             Tuple of (list of recommended item IDs, whether cold-start was used)
         """
-        with LatencyTimer() as timer:
-            # Get session data
-            session_length = self.session_store.get_session_length(session_id)
+        # Inline timing: no context-manager object on the hot path
+        t0 = perf_counter_ns()
 
-            # Check if cold-start is needed
-            if self.coldstart_handler.should_use_coldstart(session_length):
-                recommendations = self.coldstart_handler.get_recommendations(self.top_k)
-                used_coldstart = True
-            else:
-                # Use model for recommendations
-                recommendations = self._get_model_recommendations(session_id)
-                used_coldstart = False
+        # Fetch the sequence and length in one round trip; the
+        # sequence is simply unused on the cold-start branch
+        item_ids, session_length = self.session_store.get_sequence_and_length(
+            session_id, self.sequence_length
+        )
+
+        # Check if cold-start is needed
+        if self.coldstart_handler.should_use_coldstart(session_length):
+            recommendations = self.coldstart_handler.get_recommendations(self.top_k)
+            used_coldstart = True
+        else:
+            # Use model for recommendations
+            recommendations = self._get_model_recommendations(session_id, item_ids)
+            used_coldstart = False
 
         # Record metrics
         self.metrics_tracker.record_recommendation(
             items_recommended=recommendations,
-            latency_ms=timer.latency_ms,
+            latency_ms=(perf_counter_ns() - t0) * 1e-6,
             used_coldstart=used_coldstart,
         )
 
         return recommendations, used_coldstart
 
-    def _get_model_recommendations(self, session_id: str) -> List[str]:
+    async def get_recommendations_async(
+        self, session_id: str
+    ) -> Tuple[List[str], bool]:
         """
-        Get recommendations using the model.
+        Get recommendations for a session, using the request batcher.
+
+        Same contract as get_recommendations, but cache-miss forward passes
+        are coalesced with other concurrent requests into a single batch.
 
         Args:
             session_id: Session identifier
 
         Returns:
-            List of recommended item IDs
+            Tuple of (list of recommended item IDs, whether cold-start was used)
         """
-        # Get item sequence
-        item_ids = self.session_store.get_item_sequence(
+        t0 = perf_counter_ns()
+
+        (
+            item_ids,
+            session_length,
+        ) = await self.session_store.get_sequence_and_length_async(
             session_id, self.sequence_length
         )
 
-        if not item_ids:
+        if self.coldstart_handler.should_use_coldstart(session_length):
+            recommendations = self.coldstart_handler.get_recommendations(self.top_k)
+            used_coldstart = True
+        else:
+            recommendations = await self._get_model_recommendations_async(
+                session_id, item_ids
+            )
+            used_coldstart = False
+
+        self.metrics_tracker.record_recommendation(
+            items_recommended=recommendations,
+            latency_ms=(perf_counter_ns() - t0) * 1e-6,
+            used_coldstart=used_coldstart,
+        )
+
+        return recommendations, used_coldstart
+
+    def _get_model_recommendations(
+        self, session_id: str, item_ids: List[str]
+    ) -> List[str]:
+        """
+        Get recommendations using the model.
+
+        Args:
+            session_id: Session identifier
+            item_ids: Recent item IDs for the session, oldest first
+
+        Returns:
+            List of recommended item IDs
+        """
+        item_indices = self._session_item_indices(item_ids)
+        if not item_indices:
             # Fallback to cold-start if no items
             return self.coldstart_handler.get_recommendations(self.top_k)
 
-        # Convert to indices
-        item_indices = [
-            self.item_catalog.get_item_index(item_id) for item_id in item_ids
-        ]
+        if self._use_ann:
+            return self._ann_recommendations(item_indices)
 
-        # Pad sequence if needed
-        if len(item_indices) < self.sequence_length:
-            item_indices = [0] * (
-                self.sequence_length - len(item_indices)
-            ) + item_indices
-        else:
-            item_indices = item_indices[-self.sequence_length :]
+        if self.onnx_predictor is not None:
+            return self._recommendations_from_logits(self._onnx_logits(item_indices))
 
-        # Convert to tensor
-        item_seq = torch.tensor([item_indices], dtype=torch.long).to(self.device)
+        # Reuse cached keys/values when the session grew by exactly one
+        # click since the last request; otherwise run a full forward pass
+        with torch.inference_mode(), self._autocast():
+            result = self._try_incremental(session_id, item_indices)
+            if result is None:
+                result = self.model.forward(
+                    self._seq_tensor(item_indices), use_cache=True
+                )
+            logits, past_kv = result
 
-        # Get predictions
-        with torch.no_grad():
-            top_items, top_scores = self.model.predict_next_items(
-                item_seq, top_k=self.top_k
-            )
+        self._store_kv_cache(session_id, item_indices, past_kv)
+        return self._recommendations_from_logits(logits)
+
+    async def _get_model_recommendations_async(
+        self, session_id: str, item_ids: List[str]
+    ) -> List[str]:
+        """
+        Get recommendations using the model, batching cache misses.
+
+        Args:
+            session_id: Session identifier
+            item_ids: Recent item IDs for the session, oldest first
+
+        Returns:
+            List of recommended item IDs
+        """
+        item_indices = self._session_item_indices(item_ids)
+        if not item_indices:
+            return self.coldstart_handler.get_recommendations(self.top_k)
+
+        if self._use_ann:
+            return await self._ann_recommendations_async(item_indices)
+
+        if self.onnx_predictor is not None:
+            return self._recommendations_from_logits(self._onnx_logits(item_indices))
 
-        # Convert indices back to item IDs
+        with torch.inference_mode(), self._autocast():
+            result = self._try_incremental(session_id, item_indices)
+        if result is None:
+            if self.batcher is not None:
+                result = await self.batcher.submit(item_indices)
+            else:
+                with torch.inference_mode(), self._autocast():
+                    result = self.model.forward(
+                        self._seq_tensor(item_indices), use_cache=True
+                    )
+        logits, past_kv = result
+
+        self._store_kv_cache(session_id, item_indices, past_kv)
+        return self._recommendations_from_logits(logits)
+
+    def _session_item_indices(self, item_ids: List[str]) -> Optional[Tuple[int, ...]]:
+        """
+        Convert a session's item IDs to a model index sequence.
+
+        No padding is applied: the model accepts any sequence length up to
+        sequence_length at batch size 1.
+
+        Args:
+            item_ids: Recent item IDs for the session, oldest first
+
+        Returns:
+            Tuple of item indices, or None if the session is empty
+        """
+        if not item_ids:
+            return None
+        recent = item_ids[-self.sequence_length :]
+        lookup = self.item_catalog.item_to_idx.get
+        indices = np.fromiter(
+            (lookup(item_id, 0) for item_id in recent),
+            dtype=np.int64,
+            count=len(recent),
+        )
+        return tuple(indices.tolist())
+
+    def _seq_tensor(self, item_indices: Tuple[int, ...]) -> torch.Tensor:
+        """
+        Stage an index sequence into the reusable device input buffer.
+
+        The sequence stays unpadded (a length-n view of the buffer), so
+        positions match what the KV cache was built from.
+
+        Args:
+            item_indices: Item index sequence for the session
+
+        Returns:
+            Long tensor view of shape (1, len(item_indices)) on the device
+        """
+        n = len(item_indices)
+        self._seq_buf_cpu.numpy()[0, :n] = item_indices
+        if self._seq_buf_dev is not self._seq_buf_cpu:
+            self._seq_buf_dev[:, :n].copy_(self._seq_buf_cpu[:, :n], non_blocking=True)
+        return self._seq_buf_dev[:, :n]
+
+    def _recommendations_from_logits(self, logits: torch.Tensor) -> List[str]:
+        """
+        Turn a logits row into a top-k recommendation list.
+
+        Args:
+            logits: Logits tensor of shape (1, num_items)
+
+        Returns:
+            List of recommended item IDs
+        """
+        # softmax is monotonic; topk over raw logits picks the same items
+        top_scores, top_items = torch.topk(logits, k=self.top_k, dim=-1)
+
+        # Convert indices back to item IDs in one batch lookup; logits
+        # column i scores catalog index i + 1 (row 0 of the tied
+        # embedding is padding). Unknowns drop out via a vectorised mask.
         top_items_np = top_items.cpu().numpy()[0]
-        recommendations = [
-            self.item_catalog.get_item_id(int(idx)) for idx in top_items_np
-        ]
+        item_arr = self.item_catalog.get_item_ids_batch(top_items_np + 1)
+        return self._fill_recommendations(item_arr[item_arr != "unknown"].tolist())
+
+    def _onnx_logits(self, item_indices: Tuple[int, ...]) -> torch.Tensor:
+        """
+        Score a session through the ONNX Runtime session.
+
+        Args:
+            item_indices: Current item index sequence for the session
+
+        Returns:
+            Logits tensor of shape (1, num_items)
+        """
+        logits = self.onnx_predictor.run(np.asarray([item_indices], dtype=np.int64))
+        return torch.from_numpy(logits)
+
+    def _ann_recommendations(self, item_indices: Tuple[int, ...]) -> List[str]:
+        """
+        Get recommendations via an ANN search over the item embeddings.
+
+        The session embedding's nearest item embeddings are exactly the
+        top-scoring items under the tied output projection, so Qdrant's
+        HNSW lookup replaces the dense matmul over the whole catalog.
+
+        Args:
+            item_indices: Current item index sequence for the session
+
+        Returns:
+            List of recommended item IDs
+        """
+        with torch.inference_mode(), self._autocast():
+            session_vec = self.model.encode_session(self._seq_tensor(item_indices))[0]
+
+        results = self.vector_store.search_similar(
+            session_vec.float().cpu().numpy(), top_k=self.top_k
+        )
+        recommendations = [item_id for item_id, _ in results]
+        return self._fill_recommendations(recommendations)
+
+    async def _ann_recommendations_async(
+        self, item_indices: Tuple[int, ...]
+    ) -> List[str]:
+        """
+        Async variant of _ann_recommendations for event-loop callers.
+
+        The session encoding stays synchronous (it is compute, not I/O);
+        only the Qdrant search awaits.
+
+        Args:
+            item_indices: Current item index sequence for the session
+
+        Returns:
+            List of recommended item IDs
+        """
+        with torch.inference_mode(), self._autocast():
+            session_vec = self.model.encode_session(self._seq_tensor(item_indices))[0]
+
+        results = await self.vector_store.search_similar_async(
+            session_vec.float().cpu().numpy(), top_k=self.top_k
+        )
+        recommendations = [item_id for item_id, _ in results]
+        return self._fill_recommendations(recommendations)
 
-        # Filter out unknown items
-        recommendations = [
-            item_id for item_id in recommendations if item_id != "unknown"
-        ]
+    def _fill_recommendations(self, recommendations: List[str]) -> List[str]:
+        """
+        Top a known-item candidate list up with cold-start picks.
+
+        Args:
+            recommendations: Candidate item IDs, best first, already
+                filtered of unknowns
 
+        Returns:
+            List of exactly top_k (or fewer) recommended item IDs
+        """
         # If we don't have enough recommendations, supplement with cold-start
         if len(recommendations) < self.top_k:
+            seen = set(recommendations)
             coldstart_recs = self.coldstart_handler.get_recommendations(self.top_k)
             for rec in coldstart_recs:
-                if rec not in recommendations:
+                if rec not in seen:
                     recommendations.append(rec)
+                    seen.add(rec)
                 if len(recommendations) >= self.top_k:
                     break
 
         return recommendations[: self.top_k]
 
+    def _try_incremental(
+        self, session_id: str, item_indices: Tuple[int, ...]
+    ) -> Optional[Tuple[torch.Tensor, KVCache]]:
+        """
+        Run an incremental forward step if the session's cache allows it.
+
+        Applies when the cached sequence for this session is a
+        one-item-shorter prefix of the current one; then only the new item
+        is pushed through the transformer. Returns None on a cold miss or
+        once the sequence window slid past sequence_length.
+
+        Args:
+            session_id: Session identifier
+            item_indices: Current item index sequence for the session
+
+        Returns:
+            Tuple of (logits, extended KV cache), or None if a full
+            forward pass is needed
+        """
+        # Uncataloged item_ids map to padding index 0. The full forward
+        # masks those positions and gathers the last non-padding hidden
+        # state, while the incremental step attends to every cached key
+        # and always reads the newest position -- the two paths diverge,
+        # so such sequences take the full forward instead
+        if 0 in item_indices:
+            return None
+
+        cached = self._kv_cache.get(session_id)
+        if cached is None or cached[0] != item_indices[:-1]:
+            return None
+
+        new_item = torch.tensor(
+            [[item_indices[-1]]], dtype=torch.long, device=self.device
+        )
+        return self.model.forward_incremental(new_item, cached[1])
+
+    def _store_kv_cache(
+        self, session_id: str, item_indices: Tuple[int, ...], past_kv: KVCache
+    ) -> None:
+        """Store the KV cache for a session, evicting the oldest entries."""
+        # Never seed the incremental path from a sequence with padding
+        # zeros; _try_incremental rejects those sequences for parity
+        if 0 in item_indices:
+            return
+        self._kv_cache[session_id] = (item_indices, past_kv)
+        self._kv_cache.move_to_end(session_id)
+        while len(self._kv_cache) > self._kv_cache_max_sessions:
+            self._kv_cache.popitem(last=False)
+
     def record_feedback(
         self,
         session_id: str,
@@ -172,10 +514,8 @@ class RecommendationService:
             items_recommended=recommended_items, item_clicked=clicked_item
         )
 
-        # Update cold-start bandit
-        for item_id in recommended_items:
-            clicked = clicked_item == item_id
-            self.coldstart_handler.update_feedback(item_id, clicked)
+        # Update cold-start bandit in one vectorized pass
+        self.coldstart_handler.update_feedback_batch(recommended_items, clicked_item)
 
     def health_check(self) -> dict:
         """
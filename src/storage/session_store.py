@@ -1,15 +1,22 @@
 """Redis session store for managing user sessions."""
 
 import redis
-import json
+import redis.asyncio
+import time
 from typing import List, Optional
-from datetime import datetime
 
 
 class SessionStore:
     """Redis-based session store with automatic expiry."""
 
-    def __init__(self, host: str, port: int, db: int, expiry_seconds: int):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int,
+        expiry_seconds: int,
+        unix_socket_path: Optional[str] = None,
+    ):
         """
         Initialize session store.
 
@@ -18,10 +25,43 @@ class SessionStore:
             port: Redis port
             db: Redis database number
             expiry_seconds: Session expiry time in seconds
+            unix_socket_path: Optional Unix socket path; when Redis is
+                colocated this skips the TCP stack entirely
         """
-        self.redis_client = redis.Redis(
-            host=host, port=port, db=db, decode_responses=True
-        )
+        if unix_socket_path:
+            self.redis_client = redis.Redis(
+                unix_socket_path=unix_socket_path, db=db, decode_responses=True
+            )
+            self.redis_async = redis.asyncio.Redis(
+                unix_socket_path=unix_socket_path, db=db, decode_responses=True
+            )
+        else:
+            # A pre-sized blocking pool keeps bursts from stampeding into
+            # connection setup; keepalive plus periodic health checks
+            # avoid serving requests on half-dead sockets
+            pool = redis.BlockingConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                max_connections=64,
+                socket_keepalive=True,
+                health_check_interval=30,
+                decode_responses=True,
+            )
+            self.redis_client = redis.Redis(connection_pool=pool)
+            # Async client for event-loop callers; pools are not shared
+            # between the sync and async APIs
+            self.redis_async = redis.asyncio.Redis(
+                connection_pool=redis.asyncio.BlockingConnectionPool(
+                    host=host,
+                    port=port,
+                    db=db,
+                    max_connections=64,
+                    socket_keepalive=True,
+                    health_check_interval=30,
+                    decode_responses=True,
+                )
+            )
         self.expiry_seconds = expiry_seconds
 
     def _get_session_key(self, session_id: str) -> str:
@@ -38,15 +78,30 @@ class SessionStore:
         """
         key = self._get_session_key(session_id)
 
-        # Get current session data
-        session_data = self.get_session(session_id) or []
-
-        # Add new click with timestamp
-        click_data = {"item_id": item_id, "timestamp": datetime.utcnow().isoformat()}
-        session_data.append(click_data)
+        # Each click is its own list element, so appending moves O(1)
+        # bytes instead of rewriting the whole session, and RPUSH+EXPIRE
+        # share one round trip through the pipeline. Elements are
+        # "epoch_ns|item_id": an integer timestamp beats a datetime
+        # round-trip through ISO strings, and the flat format needs no
+        # serializer at all.
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.rpush(key, f"{time.time_ns()}|{item_id}")
+        pipe.expire(key, self.expiry_seconds)
+        pipe.execute()
+
+    async def add_click_async(self, session_id: str, item_id: str) -> None:
+        """
+        Add a click event to a session without blocking the event loop.
 
-        # Store back to Redis with expiry
-        self.redis_client.setex(key, self.expiry_seconds, json.dumps(session_data))
+        Args:
+            session_id: Unique session identifier
+            item_id: Item that was clicked
+        """
+        key = self._get_session_key(session_id)
+        pipe = self.redis_async.pipeline(transaction=False)
+        pipe.rpush(key, f"{time.time_ns()}|{item_id}")
+        pipe.expire(key, self.expiry_seconds)
+        await pipe.execute()
 
     def get_session(self, session_id: str) -> Optional[List[dict]]:
         """
@@ -59,10 +114,14 @@ class SessionStore:
             List of click events or None if session doesn't exist
         """
         key = self._get_session_key(session_id)
-        data = self.redis_client.get(key)
+        data = self.redis_client.lrange(key, 0, -1)
 
         if data:
-            return json.loads(data)
+            clicks = []
+            for element in data:
+                ts, item_id = element.split("|", 1)
+                clicks.append({"item_id": item_id, "ts": int(ts)})
+            return clicks
         return None
 
     def get_item_sequence(self, session_id: str, max_length: int = 5) -> List[str]:
@@ -76,13 +135,51 @@ class SessionStore:
         Returns:
             List of item IDs (most recent items)
         """
-        session_data = self.get_session(session_id)
-        if not session_data:
-            return []
+        # Server-side slice: only the last max_length elements cross the wire
+        key = self._get_session_key(session_id)
+        data = self.redis_client.lrange(key, -max_length, -1)
+        return [element.split("|", 1)[1] for element in data]
+
+    def get_sequence_and_length(self, session_id: str, max_length: int = 5) -> tuple:
+        """
+        Get the recent item sequence and total session length together.
+
+        One pipelined LRANGE+LLEN replaces separate round trips for
+        callers that need both.
+
+        Args:
+            session_id: Unique session identifier
+            max_length: Maximum sequence length
+
+        Returns:
+            Tuple of (list of recent item IDs, total click count)
+        """
+        key = self._get_session_key(session_id)
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.lrange(key, -max_length, -1)
+        pipe.llen(key)
+        data, length = pipe.execute()
+        return [element.split("|", 1)[1] for element in data], length
+
+    async def get_sequence_and_length_async(
+        self, session_id: str, max_length: int = 5
+    ) -> tuple:
+        """
+        Async variant of get_sequence_and_length for event-loop callers.
+
+        Args:
+            session_id: Unique session identifier
+            max_length: Maximum sequence length
 
-        # Extract item IDs and return last max_length items
-        item_ids = [click["item_id"] for click in session_data]
-        return item_ids[-max_length:]
+        Returns:
+            Tuple of (list of recent item IDs, total click count)
+        """
+        key = self._get_session_key(session_id)
+        pipe = self.redis_async.pipeline(transaction=False)
+        pipe.lrange(key, -max_length, -1)
+        pipe.llen(key)
+        data, length = await pipe.execute()
+        return [element.split("|", 1)[1] for element in data], length
 
     def get_session_length(self, session_id: str) -> int:
         """
@@ -94,8 +191,8 @@ class SessionStore:
         Returns:
             Number of clicks in the session
         """
-        session_data = self.get_session(session_id)
-        return len(session_data) if session_data else 0
+        key = self._get_session_key(session_id)
+        return self.redis_client.llen(key)
 
     def delete_session(self, session_id: str) -> None:
         """
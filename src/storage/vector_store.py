@@ -1,10 +1,9 @@
 """Vector database for item embeddings and similarity search."""
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Batch, Distance, VectorParams
 import numpy as np
 from typing import List, Tuple
-import uuid
 
 
 class VectorStore:
@@ -21,22 +20,35 @@ class VectorStore:
             embedding_dim: Dimension of embeddings
         """
         self.client = QdrantClient(host=host, port=port)
+        # Async client for event-loop callers (searches on the request
+        # path); bulk loading and admin calls stay on the sync client
+        self.async_client = AsyncQdrantClient(host=host, port=port)
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
         self._ensure_collection()
 
     def _ensure_collection(self):
-        """Create collection if it doesn't exist."""
+        """Create the collection, replacing it if its metric is wrong.
+
+        Dot-product similarity is load-bearing: ANN results stand in for
+        the tied output projection, whose scores are raw dot products.
+        Cosine would divide out the item-embedding norms and re-rank the
+        top-k, so a collection left over from an older build with any
+        other metric is dropped and recreated rather than reused.
+        """
         collections = self.client.get_collections().collections
         collection_names = [col.name for col in collections]
 
-        if self.collection_name not in collection_names:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim, distance=Distance.COSINE
-                ),
-            )
+        if self.collection_name in collection_names:
+            info = self.client.get_collection(self.collection_name)
+            if info.config.params.vectors.distance == Distance.DOT:
+                return
+            self.client.delete_collection(self.collection_name)
+
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(size=self.embedding_dim, distance=Distance.DOT),
+        )
 
     def add_items(self, item_ids: List[str], embeddings: np.ndarray) -> None:
         """
@@ -46,16 +58,22 @@ class VectorStore:
             item_ids: List of item IDs
             embeddings: Item embeddings [num_items, embedding_dim]
         """
-        points = [
-            PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding.tolist(),
-                payload={"item_id": item_id},
-            )
-            for item_id, embedding in zip(item_ids, embeddings)
-        ]
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
 
-        self.client.upsert(collection_name=self.collection_name, points=points)
+        # Columnar Batch payloads instead of one PointStruct per row, in
+        # chunks that keep request sizes bounded. Deterministic integer
+        # ids make re-upserts idempotent and skip uuid generation.
+        chunk_size = 1024
+        for start in range(0, len(item_ids), chunk_size):
+            end = start + chunk_size
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=Batch(
+                    ids=list(range(start, min(end, len(item_ids)))),
+                    vectors=embeddings[start:end].tolist(),
+                    payloads=[{"item_id": i} for i in item_ids[start:end]],
+                ),
+            )
 
     def search_similar(
         self, query_vector: np.ndarray, top_k: int = 5
@@ -78,6 +96,27 @@ class VectorStore:
 
         return [(hit.payload["item_id"], hit.score) for hit in results]
 
+    async def search_similar_async(
+        self, query_vector: np.ndarray, top_k: int = 5
+    ) -> List[Tuple[str, float]]:
+        """
+        Async variant of search_similar for event-loop callers.
+
+        Args:
+            query_vector: Query embedding vector
+            top_k: Number of results to return
+
+        Returns:
+            List of (item_id, score) tuples
+        """
+        results = await self.async_client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector.tolist(),
+            limit=top_k,
+        )
+
+        return [(hit.payload["item_id"], hit.score) for hit in results]
+
     def health_check(self) -> bool:
         """Check if Qdrant is healthy."""
         try:
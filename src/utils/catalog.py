@@ -1,17 +1,29 @@
 """Item catalog management."""
 
+import sys
 from typing import List, Dict
 import json
 
+import numpy as np
+
 
 class ItemCatalog:
-    """Manages the item catalog."""
+    """Manages the item catalog.
+
+    The reverse index->item mapping is a dense object array rather than a
+    dict, so single lookups skip hashing and batches of indices resolve
+    with one fancy-indexing pass. Item IDs are interned on insertion so
+    forward-dict hashing compares by pointer in the common case.
+    """
 
     def __init__(self):
         """Initialize item catalog."""
         self.items: Dict[str, Dict] = {}
         self.item_to_idx: Dict[str, int] = {}
-        self.idx_to_item: Dict[int, str] = {}
+        # Slot 0 is the padding/unknown index; grown amortised on add
+        self._idx_to_item_arr = np.empty(16, dtype=object)
+        self._idx_to_item_arr[0] = "unknown"
+        self._size = 1
 
     def add_items(self, items: List[Dict]):
         """
@@ -21,14 +33,19 @@ class ItemCatalog:
             items: List of item dictionaries with 'item_id' and optional metadata
         """
         for item in items:
-            item_id = item["item_id"]
+            item_id = sys.intern(item["item_id"])
             self.items[item_id] = item
 
             # Create index mappings if not exists
             if item_id not in self.item_to_idx:
                 idx = len(self.item_to_idx) + 1  # Start from 1 (0 is padding)
                 self.item_to_idx[item_id] = idx
-                self.idx_to_item[idx] = item_id
+                if idx >= len(self._idx_to_item_arr):
+                    grown = np.empty(len(self._idx_to_item_arr) * 2, dtype=object)
+                    grown[: self._size] = self._idx_to_item_arr[: self._size]
+                    self._idx_to_item_arr = grown
+                self._idx_to_item_arr[idx] = item_id
+                self._size = idx + 1
 
     def get_item_index(self, item_id: str) -> int:
         """Get numeric index for item ID."""
@@ -36,7 +53,27 @@ class ItemCatalog:
 
     def get_item_id(self, idx: int) -> str:
         """Get item ID from numeric index."""
-        return self.idx_to_item.get(idx, "unknown")
+        if 0 < idx < self._size:
+            return self._idx_to_item_arr[idx]
+        return "unknown"
+
+    def get_item_ids_batch(self, idx_array: np.ndarray) -> np.ndarray:
+        """
+        Get item IDs for an array of numeric indices in one pass.
+
+        Args:
+            idx_array: Array of item indices
+
+        Returns:
+            Object array of item IDs ("unknown" for out-of-range
+            indices), so callers can mask before converting to a list
+        """
+        idx_array = np.asarray(idx_array)
+        # Clip keeps fancy indexing in bounds; out-of-range entries are
+        # overwritten with "unknown" afterwards (slot 0 already is)
+        item_ids = self._idx_to_item_arr[np.clip(idx_array, 0, self._size - 1)]
+        item_ids[idx_array >= self._size] = "unknown"
+        return item_ids
 
     def get_all_item_ids(self) -> List[str]:
         """Get all item IDs."""
@@ -51,7 +88,9 @@ class ItemCatalog:
         data = {
             "items": self.items,
             "item_to_idx": self.item_to_idx,
-            "idx_to_item": {int(k): v for k, v in self.idx_to_item.items()},
+            "idx_to_item": {
+                idx: self._idx_to_item_arr[idx] for idx in range(1, self._size)
+            },
         }
         with open(filepath, "w") as f:
             json.dump(data, f, indent=2)
@@ -64,8 +103,15 @@ class ItemCatalog:
 
         catalog = cls()
         catalog.items = data["items"]
-        catalog.item_to_idx = data["item_to_idx"]
-        catalog.idx_to_item = {int(k): v for k, v in data["idx_to_item"].items()}
+        catalog.item_to_idx = {
+            sys.intern(item_id): idx for item_id, idx in data["item_to_idx"].items()
+        }
+        num_slots = max((int(k) for k in data["idx_to_item"]), default=0) + 1
+        catalog._idx_to_item_arr = np.empty(max(num_slots, 16), dtype=object)
+        catalog._idx_to_item_arr[0] = "unknown"
+        for k, v in data["idx_to_item"].items():
+            catalog._idx_to_item_arr[int(k)] = sys.intern(v)
+        catalog._size = num_slots
         return catalog
 
     @classmethod
@@ -82,15 +128,25 @@ class ItemCatalog:
         catalog = cls()
 
         categories = ["Electronics", "Clothing", "Books", "Home", "Sports"]
-        items = [
-            {
-                "item_id": f"item_{i:04d}",
+        # Vectorise the numeric/categorical columns and assign the
+        # mappings in bulk rather than paying add_items' per-item dict
+        # probes num_items times
+        ids = [sys.intern(f"item_{i:04d}") for i in range(num_items)]
+        prices = (10.0 + np.arange(num_items) * 5.0).tolist()
+        cats = np.take(categories, np.arange(num_items) % len(categories)).tolist()
+
+        catalog.items = {
+            item_id: {
+                "item_id": item_id,
                 "name": f"Product {i}",
-                "category": categories[i % len(categories)],
-                "price": 10.0 + (i * 5.0),
+                "category": category,
+                "price": price,
             }
-            for i in range(num_items)
-        ]
-
-        catalog.add_items(items)
+            for i, (item_id, category, price) in enumerate(zip(ids, cats, prices))
+        }
+        catalog.item_to_idx = {item_id: i + 1 for i, item_id in enumerate(ids)}
+        catalog._idx_to_item_arr = np.empty(num_items + 1, dtype=object)
+        catalog._idx_to_item_arr[0] = "unknown"
+        catalog._idx_to_item_arr[1:] = ids
+        catalog._size = num_items + 1
         return catalog
@@ -1,5 +1,7 @@
 """Tests for cold-start bandit."""
 
+import numpy as np
+
 from src.coldstart import ThompsonSamplingBandit, ColdStartHandler
 
 
@@ -9,8 +11,8 @@ def test_bandit_initialization():
     bandit = ThompsonSamplingBandit(item_ids)
 
     assert len(bandit.item_ids) == 3
-    assert all(bandit.alpha[item_id] == 1.0 for item_id in item_ids)
-    assert all(bandit.beta[item_id] == 1.0 for item_id in item_ids)
+    assert np.all(bandit.alpha == 1.0)
+    assert np.all(bandit.beta == 1.0)
 
 
 def test_bandit_select_items():
@@ -31,13 +33,64 @@ def test_bandit_update():
 
     # Update with positive reward
     bandit.update("item_1", reward=1.0)
-    assert bandit.alpha["item_1"] == 2.0
-    assert bandit.beta["item_1"] == 1.0
+    stats = bandit.get_statistics()
+    assert stats["item_1"]["alpha"] == 2.0
+    assert stats["item_1"]["beta"] == 1.0
 
     # Update with negative reward
     bandit.update("item_2", reward=0.0)
-    assert bandit.alpha["item_2"] == 1.0
-    assert bandit.beta["item_2"] == 2.0
+    stats = bandit.get_statistics()
+    assert stats["item_2"]["alpha"] == 1.0
+    assert stats["item_2"]["beta"] == 2.0
+
+
+def test_bandit_update_many():
+    """Test batched bandit update."""
+    item_ids = ["item_1", "item_2", "item_3"]
+    bandit = ThompsonSamplingBandit(item_ids)
+
+    bandit.update_many(
+        ["item_1", "item_2", "item_3", "missing"],
+        np.array([1.0, 0.0, 0.0, 1.0], dtype=np.float32),
+    )
+
+    stats = bandit.get_statistics()
+    assert stats["item_1"]["alpha"] == 2.0
+    assert stats["item_2"]["beta"] == 2.0
+    assert stats["item_3"]["beta"] == 2.0
+
+
+def test_bandit_select_items_cached():
+    """Test that cached selection is reused until the state changes."""
+    item_ids = ["item_1", "item_2", "item_3", "item_4", "item_5"]
+    bandit = ThompsonSamplingBandit(item_ids)
+
+    # Same version and bucket: identical selection without re-sampling
+    first = bandit.select_items_cached(k=3, ttl_seconds=60.0)
+    second = bandit.select_items_cached(k=3, ttl_seconds=60.0)
+    assert first == second
+
+    # An update bumps the version, which invalidates the cache
+    bandit.update("item_1", reward=1.0)
+    refreshed = bandit.select_items_cached(k=3, ttl_seconds=60.0)
+    assert len(refreshed) == 3
+    assert all(item in item_ids for item in refreshed)
+
+
+def test_bandit_save_load_state(tmp_path):
+    """Test npz state round-trip."""
+    item_ids = ["item_1", "item_2", "item_3"]
+    bandit = ThompsonSamplingBandit(item_ids)
+    bandit.update("item_1", reward=1.0)
+    bandit.update("item_2", reward=0.0)
+
+    filepath = str(tmp_path / "bandit.npz")
+    bandit.save_state(filepath)
+    loaded = ThompsonSamplingBandit.load_state(filepath)
+
+    assert loaded.item_ids == item_ids
+    assert np.array_equal(loaded.alpha, bandit.alpha)
+    assert np.array_equal(loaded.beta, bandit.beta)
 
 
 def test_coldstart_handler():
@@ -43,6 +43,31 @@ def test_sasrec_forward():
     assert logits.shape == (batch_size, 100)
 
 
+def test_sasrec_forward_incremental():
+    """Test that incremental forward matches the full forward pass."""
+    model = SASRec(
+        num_items=100,
+        embedding_dim=128,
+        num_heads=4,
+        num_layers=2,
+        dropout=0.1,
+        max_seq_len=5,
+    )
+    model.eval()
+
+    item_seq = torch.randint(1, 101, (1, 4))
+
+    with torch.no_grad():
+        full_logits = model.forward(item_seq)
+
+        # Replay the sequence one item at a time through the KV cache
+        logits, past_kv = model.forward(item_seq[:, :1], use_cache=True)
+        for t in range(1, item_seq.shape[1]):
+            logits, past_kv = model.forward_incremental(item_seq[:, t : t + 1], past_kv)
+
+    assert torch.allclose(full_logits, logits, atol=1e-5)
+
+
 def test_sasrec_predict_next_items():
     """Test prediction of next items."""
     model = SASRec(
@@ -0,0 +1,60 @@
+"""Tests for the recommendation service's incremental KV-cache path."""
+
+from collections import OrderedDict
+
+import torch
+
+from src.models import SASRec
+from src.service import RecommendationService
+
+
+def _bare_service(model: SASRec) -> RecommendationService:
+    """Build a service with just the state the KV-cache path touches.
+
+    The full constructor needs live Redis/Qdrant clients, so tests set up
+    only the attributes _try_incremental and _store_kv_cache read.
+    """
+    service = RecommendationService.__new__(RecommendationService)
+    service.model = model
+    service.device = torch.device("cpu")
+    service._kv_cache = OrderedDict()
+    service._kv_cache_max_sessions = 1024
+    return service
+
+
+def test_try_incremental_rejects_padding_indices():
+    """Sequences containing padding index 0 must take the full forward.
+
+    Uncataloged item_ids map to index 0; the full forward masks those
+    positions and gathers the last non-padding hidden state, which the
+    incremental path cannot reproduce, so it must refuse them.
+    """
+    model = SASRec(
+        num_items=100,
+        embedding_dim=128,
+        num_heads=4,
+        num_layers=2,
+        dropout=0.1,
+        max_seq_len=5,
+    )
+    model.eval()
+    service = _bare_service(model)
+
+    with torch.inference_mode():
+        # A clean prefix replays incrementally and matches the full pass
+        _, past_kv = model.forward(torch.tensor([[7, 3]]), use_cache=True)
+        service._store_kv_cache("s1", (7, 3), past_kv)
+        result = service._try_incremental("s1", (7, 3, 4))
+        assert result is not None
+        full_logits = model.forward(torch.tensor([[7, 3, 4]]))
+        assert torch.allclose(full_logits, result[0], atol=1e-5)
+
+        # A zero mid-sequence is rejected even with a matching cached
+        # prefix
+        _, zero_kv = model.forward(torch.tensor([[7, 0]]), use_cache=True)
+        service._kv_cache["s2"] = ((7, 0), zero_kv)
+        assert service._try_incremental("s2", (7, 0, 4)) is None
+
+        # Sequences with zeros never seed the cache either
+        service._store_kv_cache("s3", (7, 0, 4), zero_kv)
+        assert "s3" not in service._kv_cache
@@ -6,6 +6,8 @@ from torch.utils.data import Dataset, DataLoader
 import numpy as np
 from typing import List, Tuple
 import argparse
+import hashlib
+import os
 
 from src.models import SASRec
 from src.utils import ItemCatalog
@@ -18,86 +20,166 @@ class SessionDataset(Dataset):
     def __init__(self, sequences: List[List[int]], sequence_length: int = 5):
         """
         Initialize dataset.
-        
+
         Args:
             sequences: List of item ID sequences
             sequence_length: Maximum sequence length
         """
-        self.sequences = sequences
         self.sequence_length = sequence_length
-        self.samples = self._create_samples()
-    
-    def _create_samples(self) -> List[Tuple[List[int], int]]:
-        """Create training samples from sequences."""
-        samples = []
-        
-        for seq in self.sequences:
+        self._build_index(sequences)
+
+    def _build_index(self, sequences: List[List[int]]) -> None:
+        """Index training samples over one concatenated token stream.
+
+        Instead of materialising every left-padded (input, target) pair
+        -- which duplicates each token up to sequence_length times -- the
+        corpus is kept as a single int64 stream plus a per-sample
+        (target_pos, seq_start) table. Batches gather their windows from
+        the stream on the fly, so storage is O(total_tokens).
+        """
+        kept = [
+            # int32 tokens halve the stream footprint and the bytes the
+            # embedding gather reads per index; nn.Embedding accepts
+            # int32 indices directly
+            np.asarray(seq, dtype=np.int32)
+            for seq in sequences
             # Need at least 2 items (input and target)
-            if len(seq) < 2:
-                continue
-            
-            # Create multiple samples from each sequence
-            for i in range(1, len(seq)):
-                input_seq = seq[:i]
-                target = seq[i]
-                
-                # Pad or truncate input sequence
-                if len(input_seq) < self.sequence_length:
-                    input_seq = [0] * (self.sequence_length - len(input_seq)) + input_seq
-                else:
-                    input_seq = input_seq[-self.sequence_length:]
-                
-                samples.append((input_seq, target))
-        
-        return samples
-    
+            if len(seq) >= 2
+        ]
+        if not kept:
+            self.stream = np.empty(0, dtype=np.int32)
+            self.sample_index = np.empty((0, 2), dtype=np.int64)
+            self._build_windows()
+            return
+
+        self.stream = np.concatenate(kept)
+        lengths = np.array([len(arr) for arr in kept], dtype=np.int64)
+        starts = np.zeros(len(kept) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=starts[1:])
+
+        # Every stream position except a sequence start is a target; its
+        # input window is the (up to sequence_length) tokens before it,
+        # clipped at the owning sequence's start
+        target_mask = np.ones(len(self.stream), dtype=bool)
+        target_mask[starts[:-1]] = False
+        self.sample_index = np.empty((int(target_mask.sum()), 2), dtype=np.int64)
+        self.sample_index[:, 0] = np.nonzero(target_mask)[0]
+        self.sample_index[:, 1] = np.repeat(starts[:-1], lengths - 1)
+        self._build_windows()
+
+    def _build_windows(self) -> None:
+        """Expose every input window as a strided view over the stream.
+
+        sliding_window_view over the front-padded stream yields row t as
+        the sequence_length tokens before target position t -- zero extra
+        storage, since rows alias the same buffer. __getitems__ then only
+        gathers rows and masks off tokens belonging to earlier sequences.
+        """
+        padded = np.concatenate(
+            [np.zeros(self.sequence_length, dtype=self.stream.dtype), self.stream]
+        )
+        self._windows = np.lib.stride_tricks.sliding_window_view(
+            padded, self.sequence_length
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        stream: np.ndarray,
+        sample_index: np.ndarray,
+        sequence_length: int = 5,
+    ) -> "SessionDataset":
+        """Build a dataset directly from a prebuilt stream and index.
+
+        Used by the on-disk dataset cache: memory-mapped arrays plug in
+        here without rerunning _build_index.
+        """
+        self = cls.__new__(cls)
+        self.sequence_length = sequence_length
+        self.stream = stream
+        self.sample_index = sample_index
+        self._build_windows()
+        return self
+
     def __len__(self) -> int:
-        return len(self.samples)
-    
+        return len(self.sample_index)
+
     def __getitem__(self, idx: int) -> Tuple[torch.Tensor, torch.Tensor]:
-        input_seq, target = self.samples[idx]
-        return torch.tensor(input_seq, dtype=torch.long), torch.tensor(target, dtype=torch.long)
+        inputs, targets = self.__getitems__([idx])
+        return inputs[0], targets[0]
+
+    def __getitems__(self, indices: List[int]) -> Tuple[torch.Tensor, torch.Tensor]:
+        # Batched fetch path: one row gather from the strided window view
+        # materialises the whole batch; tokens from before the owning
+        # sequence's start are masked back to padding zeros
+        rows = self.sample_index[indices]
+        targets = rows[:, 0]
+        context = np.minimum(targets - rows[:, 1], self.sequence_length)
+        valid = np.arange(self.sequence_length) >= self.sequence_length - context[:, None]
+        inputs = np.where(valid, self._windows[targets], 0)
+        # Targets stay int64: CrossEntropyLoss requires long class indices
+        return (
+            torch.from_numpy(inputs),
+            torch.from_numpy(self.stream[targets].astype(np.int64)),
+        )
+
+
+def _identity_collate(batch):
+    """Pass through batches already collated by SessionDataset.__getitems__."""
+    return batch
+
+
+def _seed_worker(worker_id: int) -> None:
+    """Give each DataLoader worker its own NumPy stream.
+
+    Workers fork with identical inherited RNG state; without reseeding,
+    any NumPy randomness they run produces duplicated streams. The torch
+    per-worker seed is already distinct, so derive from it.
+    """
+    np.random.seed(torch.initial_seed() % 2**32)
 
 
 def generate_synthetic_data(
     num_items: int = 100,
     num_sequences: int = 1000,
     min_seq_len: int = 3,
-    max_seq_len: int = 10
+    max_seq_len: int = 10,
+    seed: int = None
 ) -> List[List[int]]:
     """
     Generate synthetic session data for training.
-    
+
     Args:
         num_items: Number of items in catalog
         num_sequences: Number of sequences to generate
         min_seq_len: Minimum sequence length
         max_seq_len: Maximum sequence length
-        
+        seed: Optional seed for reproducible generation
+
     Returns:
         List of item ID sequences
     """
-    sequences = []
-    
-    for _ in range(num_sequences):
-        seq_len = np.random.randint(min_seq_len, max_seq_len + 1)
-        # Generate sequences with some temporal correlation
-        start_item = np.random.randint(1, num_items + 1)
-        sequence = [start_item]
-        
-        for _ in range(seq_len - 1):
-            # 70% chance to pick nearby item, 30% random
-            if np.random.random() < 0.7:
-                next_item = start_item + np.random.randint(-5, 6)
-                next_item = max(1, min(num_items, next_item))
-            else:
-                next_item = np.random.randint(1, num_items + 1)
-            sequence.append(next_item)
-            start_item = next_item
-        
-        sequences.append(sequence)
-    
-    return sequences
+    # Pre-draw all randomness in batched calls; the only remaining Python
+    # loop advances the sequential recurrence one step at a time across
+    # every sequence simultaneously
+    rng = np.random.default_rng(seed)
+    seq_lens = rng.integers(min_seq_len, max_seq_len + 1, size=num_sequences)
+    deltas = rng.integers(-5, 6, size=(num_sequences, max_seq_len - 1))
+    coins = rng.random((num_sequences, max_seq_len - 1))
+    rand_items = rng.integers(1, num_items + 1, size=(num_sequences, max_seq_len - 1))
+
+    items = np.empty((num_sequences, max_seq_len), dtype=np.int64)
+    items[:, 0] = rng.integers(1, num_items + 1, size=num_sequences)
+    current = items[:, 0]
+    for step in range(max_seq_len - 1):
+        # 70% chance to pick nearby item, 30% random
+        nearby = np.clip(current + deltas[:, step], 1, num_items)
+        current = np.where(coins[:, step] < 0.7, nearby, rand_items[:, step])
+        items[:, step + 1] = current
+
+    return [
+        items[i, : seq_lens[i]].tolist() for i in range(num_sequences)
+    ]
 
 
 def train_model(
@@ -105,21 +187,37 @@ def train_model(
     train_loader: DataLoader,
     num_epochs: int = 10,
     learning_rate: float = 0.001,
-    device: str = "cpu"
+    device: str = "cpu",
+    accum_steps: int = 1
 ):
     """
     Train the SASRec model.
-    
+
     Args:
         model: SASRec model
         train_loader: Training data loader
         num_epochs: Number of training epochs
         learning_rate: Learning rate
         device: Device to train on
+        accum_steps: Micro-batches to accumulate per optimizer step
     """
     model.to(device)
-    criterion = nn.CrossEntropyLoss(ignore_index=0)
-    optimizer = optim.Adam(model.parameters(), lr=learning_rate)
+    # Logits column i scores catalog index i + 1 (row 0 of the tied
+    # embedding is padding), so targets shift down by one; a padding
+    # target of 0 becomes the ignored -1
+    criterion = nn.CrossEntropyLoss(ignore_index=-1)
+    device_type = torch.device(device).type
+    # fused=True folds each parameter's moment updates and write into one
+    # CUDA kernel; on CPU, foreach batches the updates across tensors
+    if device_type == "cuda":
+        optimizer = optim.Adam(model.parameters(), lr=learning_rate, fused=True)
+    else:
+        optimizer = optim.Adam(model.parameters(), lr=learning_rate, foreach=True)
+
+    # Mixed precision on CUDA: fp16 matmuls on tensor cores with scaled
+    # gradients; both collapse to no-ops on CPU
+    use_amp = device_type == "cuda"
+    scaler = torch.amp.GradScaler(device_type, enabled=use_amp)
     
     print(f"Training on {device}")
     print(f"Total samples: {len(train_loader.dataset)}")
@@ -128,32 +226,48 @@ def train_model(
     
     for epoch in range(num_epochs):
         model.train()
-        total_loss = 0
+        # Accumulate on device; .item() forces a stream sync, so it only
+        # happens when a value is actually printed
+        running_loss = torch.zeros((), device=device)
         num_batches = 0
         
+        # set_to_none skips the memset over every grad buffer and lets
+        # backward's first write allocate fresh
+        optimizer.zero_grad(set_to_none=True)
         for batch_idx, (sequences, targets) in enumerate(train_loader):
-            sequences = sequences.to(device)
-            targets = targets.to(device)
-            
-            # Forward pass
-            optimizer.zero_grad()
-            logits = model(sequences)
-            loss = criterion(logits, targets)
-            
-            # Backward pass
-            loss.backward()
-            optimizer.step()
-            
-            total_loss += loss.item()
+            # Pinned source + non_blocking lets the H2D copy overlap with
+            # enqueueing the forward pass
+            sequences = sequences.to(device, non_blocking=True)
+            targets = targets.to(device, non_blocking=True)
+
+            with torch.autocast(
+                device_type=device_type, dtype=torch.float16, enabled=use_amp
+            ):
+                logits = model(sequences)
+                loss = criterion(logits, targets - 1)
+
+            # Gradients accumulate over accum_steps micro-batches, then
+            # one optimizer step covers the whole effective batch; the
+            # 1/accum_steps scale keeps full-batch loss semantics
+            scaler.scale(loss / accum_steps).backward()
+            if (batch_idx + 1) % accum_steps == 0:
+                scaler.step(optimizer)
+                scaler.update()
+                optimizer.zero_grad(set_to_none=True)
+
+            running_loss += loss.detach()
             num_batches += 1
-            
-            if (batch_idx + 1) % 50 == 0:
-                avg_loss = total_loss / num_batches
-                print(f"Epoch [{epoch+1}/{num_epochs}], "
-                      f"Batch [{batch_idx+1}/{len(train_loader)}], "
-                      f"Loss: {avg_loss:.4f}")
-        
-        avg_epoch_loss = total_loss / num_batches
+
+        # Flush a trailing partial accumulation window
+        if num_batches % accum_steps != 0:
+            scaler.step(optimizer)
+            scaler.update()
+            optimizer.zero_grad(set_to_none=True)
+
+        # Log once per epoch: mid-epoch prints flush stdout and force a
+        # device sync through .item() on every report, so all reporting
+        # waits for the epoch boundary
+        avg_epoch_loss = (running_loss / num_batches).item()
         print(f"Epoch [{epoch+1}/{num_epochs}] completed. Average Loss: {avg_epoch_loss:.4f}\n")
     
     print("Training completed!")
@@ -168,6 +282,9 @@ def main():
     parser.add_argument("--num-epochs", type=int, default=10, help="Number of epochs")
     parser.add_argument("--learning-rate", type=float, default=0.001, help="Learning rate")
     parser.add_argument("--output", type=str, default="model.pth", help="Output model path")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for data generation")
+    parser.add_argument("--accum-steps", type=int, default=1,
+                        help="Micro-batches to accumulate per optimizer step")
     args = parser.parse_args()
     
     # Get settings
@@ -176,22 +293,67 @@ def main():
     # Set device
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Using device: {device}\n")
+
+    # TF32 tensor-core matmuls for whatever stays in fp32, and let cudnn
+    # autotune kernels for our fixed batch shapes
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cudnn.benchmark = True
     
-    # Generate synthetic data
-    print("Generating synthetic training data...")
-    sequences = generate_synthetic_data(
-        num_items=args.num_items,
-        num_sequences=args.num_sequences
-    )
-    print(f"Generated {len(sequences)} sequences\n")
-    
-    # Create dataset and dataloader
-    dataset = SessionDataset(sequences, sequence_length=settings.sequence_length)
+    # Dataset cache: seeded repeat runs with the same shape parameters
+    # mmap the prebuilt sample arrays instead of regenerating them;
+    # mapped pages are shared across DataLoader workers through the page
+    # cache. Unseeded runs expect fresh data every time, so they bypass
+    # the cache entirely.
+    use_cache = args.seed is not None
+    cache_key = hashlib.sha1(
+        f"{args.num_items}:{args.num_sequences}:{settings.sequence_length}:{args.seed}".encode()
+    ).hexdigest()[:16]
+    cache_dir = ".cache"
+    stream_path = os.path.join(cache_dir, f"ds_{cache_key}_stream.npy")
+    index_path = os.path.join(cache_dir, f"ds_{cache_key}_index.npy")
+
+    if use_cache and os.path.exists(stream_path) and os.path.exists(index_path):
+        print("Loading cached training data...")
+        dataset = SessionDataset.from_arrays(
+            np.load(stream_path, mmap_mode="r"),
+            np.load(index_path, mmap_mode="r"),
+            sequence_length=settings.sequence_length,
+        )
+        print(f"Loaded {len(dataset)} cached samples\n")
+    else:
+        # Generate synthetic data
+        print("Generating synthetic training data...")
+        sequences = generate_synthetic_data(
+            num_items=args.num_items,
+            num_sequences=args.num_sequences,
+            seed=args.seed
+        )
+        print(f"Generated {len(sequences)} sequences\n")
+
+        dataset = SessionDataset(sequences, sequence_length=settings.sequence_length)
+        if use_cache:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(stream_path, dataset.stream)
+            np.save(index_path, dataset.sample_index)
+
+    # Create dataloader
+    # Worker processes overlap batch preparation with the training step;
+    # persistent workers skip the per-epoch respawn and prefetching keeps
+    # the queue ahead of the optimizer
+    num_workers = min(8, (os.cpu_count() or 2) // 2)
     train_loader = DataLoader(
         dataset,
         batch_size=args.batch_size,
         shuffle=True,
-        num_workers=0
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0,
+        prefetch_factor=4 if num_workers > 0 else None,
+        pin_memory=torch.cuda.is_available(),
+        collate_fn=_identity_collate,
+        worker_init_fn=_seed_worker,
+        # Keep every batch the same shape so the compiled graph below
+        # never recompiles on a trailing partial batch
+        drop_last=True,
     )
     
     # Create model
@@ -205,6 +367,13 @@ def main():
         max_seq_len=settings.sequence_length
     )
     print(f"Model created with {sum(p.numel() for p in model.parameters())} parameters\n")
+
+    # Trace the fixed-shape forward/backward into fused Inductor kernels
+    # once, removing per-op Python dispatch from every training step;
+    # dynamic=False is safe because the sequence length is fixed and the
+    # loader drops the last partial batch
+    if torch.cuda.is_available():
+        model = torch.compile(model, mode="reduce-overhead", dynamic=False)
     
     # Train model
     train_model(
@@ -212,13 +381,19 @@ def main():
         train_loader,
         num_epochs=args.num_epochs,
         learning_rate=args.learning_rate,
-        device=device
+        device=device,
+        accum_steps=args.accum_steps
     )
     
-    # Save model
+    # Save model. Unwrap the compiled module so checkpoint keys are free
+    # of the _orig_mod prefix, copy to host in one pass, and write in the
+    # zipfile format, which streams each storage as raw bytes and
+    # deduplicates the tied embedding/output weights
     print(f"Saving model to {args.output}...")
+    sd = (model._orig_mod if hasattr(model, "_orig_mod") else model).state_dict()
+    sd = {k: v.cpu() for k, v in sd.items()}
     torch.save({
-        'model_state_dict': model.state_dict(),
+        'model_state_dict': sd,
         'num_items': args.num_items,
         'config': {
             'embedding_dim': settings.embedding_dim,
@@ -227,7 +402,7 @@ def main():
             'dropout': settings.dropout,
             'sequence_length': settings.sequence_length
         }
-    }, args.output)
+    }, args.output, _use_new_zipfile_serialization=True)
     print("✓ Model saved successfully!")
 
 